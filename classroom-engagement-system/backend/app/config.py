@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings
 
 
@@ -8,24 +9,25 @@ class Settings(BaseSettings):
     # FastAPI
     app_name: str = "Classroom Engagement System"
     debug: bool = False
+    # Uvicorn processes started by `python -m app.main`
+    workers: int = 1
     
-    # MongoDB
-    mongodb_url: str = os.getenv(
-        "MONGODB_URL",
-        "mongodb://localhost:27017/classroom"
-    )
+    # MongoDB (fields are read from the matching environment variables, e.g. MONGODB_URL)
+    mongodb_url: str = "mongodb://localhost:27017/classroom"
     db_name: str = "classroom"
     
     # Redis
-    redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    redis_url: str = "redis://localhost:6379"
     
     # Celery
-    celery_broker_url: str = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379")
-    celery_result_backend: str = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379")
+    celery_broker_url: str = "redis://localhost:6379"
+    celery_result_backend: str = "redis://localhost:6379"
     
     # Pyannote
     pyannote_model: str = "pyannote/speaker-diarization-3.1"
     pyannote_segmentation: str = "pyannote/segmentation-3.0"
+    # Development only: use placeholder speaker turns when pyannote is not installed
+    allow_mock_diarization: bool = False
     
     # Storage (place uploads under /app/uploads so they are inside the project directory)
     upload_dir: str = os.path.abspath(os.path.join(os.path.dirname(__file__), "../uploads"))
@@ -35,4 +37,7 @@ class Settings(BaseSettings):
         case_sensitive = False
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings once and reuse them for the life of the process"""
+    return Settings()
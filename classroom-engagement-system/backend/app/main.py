@@ -1,13 +1,55 @@
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import settings
-from app.routes.meetings import router as meetings_router
+from fastapi.responses import ORJSONResponse
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure
+from redis import asyncio as aioredis
+from app.config import get_settings
+from app.routes.meetings import router as meetings_router, UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared connections on startup (after worker fork) and close them on shutdown"""
+    settings = get_settings()
+    # Set here rather than at import; the schema is built on the first /docs request
+    app.title = settings.app_name
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+
+    mongodb_client = AsyncIOMotorClient(settings.mongodb_url)
+    app.state.mongodb_client = mongodb_client
+    meetings_collection = mongodb_client[settings.db_name]["meetings"]
+    app.state.meetings_collection = meetings_collection
+
+    # Point lookups by meeting_id and newest-first listing
+    try:
+        await meetings_collection.create_index("meeting_id", unique=True)
+    except OperationFailure as e:
+        # Collections written before the index existed may repeat a meeting_id;
+        # index it without the constraint so lookups stay fast and the API still starts
+        logger.warning("Could not create unique meeting_id index, using a non-unique one: %s", e)
+        await meetings_collection.create_index("meeting_id")
+    await meetings_collection.create_index([("created_at", -1)])
+
+    # Cache for finished analyses (invalidated by the Celery worker on write)
+    app.state.redis = aioredis.from_url(settings.redis_url)
+
+    yield
+
+    await app.state.redis.aclose()
+    mongodb_client.close()
+
 
 # Initialize FastAPI app
 app = FastAPI(
-    title=settings.app_name,
     description="Analyze classroom engagement through speaker diarization and participation metrics",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -43,5 +85,14 @@ async def health_check():
 
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop is not available on Windows; fall back to the default asyncio loop there
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=get_settings().workers
+    )
@@ -0,0 +1,197 @@
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
+from enum import Enum
+from functools import cached_property
+import numpy as np
+
+
+class SourceType(str, Enum):
+    LIVE = "live"
+    TEAMS = "teams"
+
+
+class SpeakerSegment(BaseModel):
+    start: float = Field(..., description="Start time in seconds")
+    end: float = Field(..., description="End time in seconds")
+    speaker_id: str = Field(..., description="Speaker identifier")
+    confidence: Optional[float] = Field(default=None)
+
+    @classmethod
+    def batch_from_arrays(
+        cls,
+        starts,
+        ends,
+        speaker_ids,
+        confidences=None
+    ) -> List["SpeakerSegment"]:
+        """
+        Build many segments from parallel arrays without per-object validation
+        Values are coerced once, column by column, then set via model_construct
+        """
+        starts = np.asarray(starts, dtype=np.float64).tolist()
+        ends = np.asarray(ends, dtype=np.float64).tolist()
+        speaker_ids = [str(sid) for sid in speaker_ids]
+        if confidences is None:
+            confidences = [None] * len(starts)
+        return [
+            cls.model_construct(start=s, end=e, speaker_id=sid, confidence=c)
+            for s, e, sid, c in zip(starts, ends, speaker_ids, confidences)
+        ]
+
+
+class SegmentArrays(BaseModel):
+    """
+    Struct-of-arrays form of a list of SpeakerSegment
+    Used for storage and metric computation; SpeakerSegment stays the API view
+    """
+    start: List[float] = Field(default_factory=list)
+    end: List[float] = Field(default_factory=list)
+    speaker_id: List[str] = Field(default_factory=list)
+    confidence: List[Optional[float]] = Field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    @classmethod
+    def from_segments(cls, segments: List[SpeakerSegment]) -> "SegmentArrays":
+        """Build the parallel arrays from a list of segments"""
+        return cls(
+            start=[s.start for s in segments],
+            end=[s.end for s in segments],
+            speaker_id=[s.speaker_id for s in segments],
+            confidence=[s.confidence for s in segments],
+        )
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Expand back to one dict per segment (the API representation)"""
+        return [
+            {"start": s, "end": e, "speaker_id": sp, "confidence": c}
+            for s, e, sp, c in zip(self.start, self.end, self.speaker_id, self.confidence)
+        ]
+
+    def to_segments(self) -> List[SpeakerSegment]:
+        """Expand back to SpeakerSegment objects"""
+        return [SpeakerSegment(**record) for record in self.to_records()]
+
+
+class SilenceSegment(BaseModel):
+    start: float = Field(..., description="Start time in seconds")
+    end: float = Field(..., description="End time in seconds")
+    duration: float = Field(..., description="Duration in seconds")
+
+
+class SpeakerAnalysis(BaseModel):
+    """Comprehensive analysis for a single speaker"""
+    speaker_id: str
+    talk_time: float
+    participation_percentage: float
+    
+    # Transcription
+    transcript: str = Field(default="")
+    word_count: int = Field(default=0)
+    
+    # Filler words
+    filler_count: int = Field(default=0)
+    filler_ratio: float = Field(default=0.0)
+    filler_breakdown: Dict[str, int] = Field(default_factory=dict)
+    
+    # Silence/pauses
+    total_silence_duration: float = Field(default=0.0)
+    silence_percentage: float = Field(default=0.0)
+    pause_count: int = Field(default=0)
+    average_pause_duration: float = Field(default=0.0)
+    
+    # Sentiment & tone
+    sentiment_polarity: float = Field(default=0.0)  # -1 to 1
+    sentiment_label: str = Field(default="neutral")
+    engagement_from_sentiment: float = Field(default=0.0)
+    dominant_emotion: str = Field(default="neutral")
+    
+    # Engagement metrics
+    speaker_engagement_score: float = Field(default=0.0)
+    turn_count: int = Field(default=0)
+
+
+class MeetingAnalysis(BaseModel):
+    meeting_id: str
+    source_type: SourceType
+    duration: float
+    segments: List[SpeakerSegment]
+    
+    # Overall engagement metrics
+    engagement_score: float
+    speaker_talk_time: dict  # {speaker_id: total_time}
+    speaker_participation: dict  # {speaker_id: percentage}
+    turn_taking_frequency: float  # turns per minute
+    
+    # Per-speaker comprehensive analysis
+    speaker_analysis: Dict[str, SpeakerAnalysis] = Field(default_factory=dict)
+    
+    # Overall statistics
+    meeting_transcript: str = Field(default="")
+    total_filler_count: int = Field(default=0)
+    average_filler_ratio: float = Field(default=0.0)
+    most_common_fillers: Dict[str, int] = Field(default_factory=dict)
+    
+    # Silence statistics
+    total_silence_time: float = Field(default=0.0)
+    silence_segments: List[SilenceSegment] = Field(default_factory=list)
+    pause_statistics: Dict[str, Any] = Field(default_factory=dict)
+    
+    # Sentiment statistics
+    overall_sentiment: str = Field(default="neutral")
+    average_polarity: float = Field(default=0.0)
+    emotional_tone: str = Field(default="calm")
+    
+    # Insights and recommendations
+    analysis_insights: List[str] = Field(default_factory=list)
+    recommendations: List[str] = Field(default_factory=list)
+    
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    audio_file_name: Optional[str] = None
+
+    @field_validator("segments", mode="before")
+    @classmethod
+    def _expand_segment_arrays(cls, value):
+        """Accept segments stored in struct-of-arrays form"""
+        if isinstance(value, SegmentArrays):
+            return value.to_records()
+        if isinstance(value, dict):
+            return SegmentArrays(**value).to_records()
+        return value
+
+    @cached_property
+    def segment_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (starts, ends, speaker_ids) of the segments as NumPy arrays, built once
+        Replace segments through replace_segments so this is rebuilt
+        """
+        count = len(self.segments)
+        return (
+            np.fromiter((s.start for s in self.segments), dtype=np.float64, count=count),
+            np.fromiter((s.end for s in self.segments), dtype=np.float64, count=count),
+            np.array([s.speaker_id for s in self.segments]),
+        )
+
+    def replace_segments(self, segments: List[SpeakerSegment]) -> None:
+        """Swap in new segments and drop the cached segment arrays"""
+        self.segments = segments
+        self.__dict__.pop("segment_arrays", None)
+
+
+# Built once at import; reused for validating and serializing stored analyses
+MeetingAnalysisAdapter = TypeAdapter(MeetingAnalysis)
+SpeakerAnalysisAdapter = TypeAdapter(SpeakerAnalysis)
+
+
+class FileUploadRequest(BaseModel):
+    meeting_id: str
+    source_type: SourceType
+
+
+class AudioChunkRequest(BaseModel):
+    meeting_id: str
+    source_type: SourceType
+    chunk: bytes
+    timestamp: float
@@ -1,28 +1,71 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
-import subprocess
-import shutil
+from fastapi import APIRouter, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect, Request, Depends
+from fastapi.responses import Response, StreamingResponse
 import os
-import uuid
+import time
 import logging
-from pathlib import Path
-from app.config import settings
-from app.models.meeting import SourceType, MeetingAnalysis
-from pymongo import MongoClient
-from bson.objectid import ObjectId
+import weakref
+import aiofiles
+import orjson
+from redis.exceptions import RedisError
+from pathlib import Path, PurePosixPath
+from uuid import uuid4 as _uuid4
+from typing import Final, Optional
+from app.models.meeting import MeetingAnalysisAdapter, SpeakerAnalysisAdapter
+from app.utils.cache import analysis_cache_key, ANALYSIS_CACHE_TTL
+from app.tasks.celery_app import celery_app
 
 logger = logging.getLogger("uvicorn.error")
 
 
 router = APIRouter()
 
-# Initialize MongoDB connection
-mongodb_client = MongoClient(settings.mongodb_url)
-db = mongodb_client[settings.db_name]
-meetings_collection = db["meetings"]
+# Store active WebSocket connections (weak, so stray connections are collected)
+active_websockets = weakref.WeakValueDictionary()
 
-# Store active WebSocket connections
-active_websockets = {}
+# Tasks are enqueued by name so the API process never imports the ML stack
+ANALYZE_AUDIO_TASK = "app.tasks.diarization.analyze_audio_task"
+
+# Extensions the worker knows how to route (audio as-is, video through ffmpeg)
+UPLOAD_EXTENSIONS: Final[frozenset[str]] = frozenset({
+    ".wav", ".mp3", ".mp4", ".m4a", ".webm", ".mkv", ".ogg",
+})
+
+# Minimum seconds between live-stream acknowledgements
+LIVE_ACK_INTERVAL = 1.0
+
+# Uploads are streamed to disk in fixed-size chunks so memory stays flat
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# Upload directory (absolute path), resolved once at import and created by the app lifespan
+UPLOAD_DIR = Path(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../uploads")))
+
+
+def sniff_container(header: bytes) -> Optional[str]:
+    """
+    Identify an upload's container from its leading magic bytes
+    Returns the container extension (without dot) or None if unsupported
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:3] == b"ID3" or (len(header) >= 2 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    if header[4:8] == b"ftyp":
+        return "mp4"
+    if header[:4] == b"\x1aE\xdf\xa3":
+        return "webm"
+    if header[:4] == b"OggS":
+        return "ogg"
+    return None
+
+
+def get_meetings_collection(request: Request):
+    """Return the async meetings collection opened by the app lifespan"""
+    return request.app.state.meetings_collection
+
+
+def get_redis(request: Request):
+    """Return the async Redis client opened by the app lifespan"""
+    return request.app.state.redis
 
 
 @router.post("/analyze-meeting")
@@ -33,105 +76,55 @@ async def analyze_meeting(file: UploadFile = File(...), meeting_id: str = None,
     """
     
     try:
-        if not meeting_id:
-            meeting_id = str(uuid.uuid4())
-
-        # Prepare upload directory (absolute path) and ensure it exists
-        upload_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../uploads"))
-        Path(upload_dir).mkdir(parents=True, exist_ok=True)
+        meeting_id = meeting_id or _uuid4().hex
 
         # Log incoming upload metadata for debugging
         logger.info("Incoming upload: filename=%s content_type=%s meeting_id=%s", file.filename, file.content_type, meeting_id)
 
-        # Accept audio and common video container types (video will be extracted to audio)
-        valid_upload_types = {
-            # audio
-            "audio/wav",
-            "audio/x-wav",
-            "audio/wave",
-            "audio/vnd.wave",
-            "audio/mpeg",
-            "audio/mp3",
-            "audio/x-mpeg",
-            # video (we will extract audio using ffmpeg)
-            "video/mp4",
-            "video/webm",
-            "video/ogg",
-            "video/x-matroska",
-        }
+        # Accept audio and common video containers (the worker extracts audio from video).
+        # The container is sniffed from the magic bytes because browsers often mislabel
+        # the Content-Type, and we reject before anything is written to disk.
+        header = await file.read(12)
+        await file.seek(0)
+        container = sniff_container(header)
 
-        if (file.content_type is None) or (file.content_type not in valid_upload_types):
-            logger.warning("Rejected upload due to content_type=%s", file.content_type)
+        if container is None:
+            logger.warning("Rejected upload with unrecognised header (content_type=%s)", file.content_type)
             raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Accepted types: {sorted(valid_upload_types)}. Received: {file.content_type}"
+                status_code=415,
+                detail="Unsupported media type. Accepted containers: WAV, MP3, MP4, WebM/MKV, Ogg"
             )
 
         # Save uploaded file safely
-        file_extension = os.path.splitext(file.filename)[1] or ".wav"
-        file_path = os.path.join(upload_dir, f"{meeting_id}{file_extension}")
+        # Trust the sniffed container over an unknown or missing filename extension
+        file_extension = PurePosixPath(file.filename or "").suffix.lower()
+        if file_extension not in UPLOAD_EXTENSIONS:
+            file_extension = f".{container}"
+        file_path = UPLOAD_DIR / f"{meeting_id}{file_extension}"
 
         try:
-            content = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(content)
+            async with aiofiles.open(file_path, "wb") as f:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await f.write(chunk)
         except Exception as write_err:
             logger.exception("Failed to write upload to %s", file_path)
             raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {str(write_err)}")
 
-        # If a video was uploaded, extract audio to a WAV file using ffmpeg
-        if file.content_type.startswith("video/"):
-            audio_path = os.path.splitext(file_path)[0] + ".wav"
-
-            # Ensure ffmpeg is available
-            if not shutil.which("ffmpeg"):
-                logger.error("ffmpeg not found in container PATH")
-                raise HTTPException(status_code=500, detail="Server missing ffmpeg to extract audio from video")
+        # Hand off to Celery worker.
+        # Video uploads are converted to audio by the worker, not in the request.
+        task = celery_app.send_task(ANALYZE_AUDIO_TASK, kwargs={
+            "file_path": str(file_path),
+            "meeting_id": meeting_id,
+            "source_type": source_type,
+            "audio_file_name": file.filename
+        })
 
-            try:
-                logger.info("Extracting audio from video %s to %s", file_path, audio_path)
-                # Convert to mono 16kHz WAV which the diarization expects
-                subprocess.run([
-                    "ffmpeg",
-                    "-y",
-                    "-i",
-                    file_path,
-                    "-ar",
-                    "16000",
-                    "-ac",
-                    "1",
-                    audio_path
-                ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-                # remove original video to save space
-                try:
-                    os.remove(file_path)
-                except Exception:
-                    logger.warning("Could not remove original uploaded video: %s", file_path)
-
-                # set file_path to the extracted audio for downstream processing
-                file_path = audio_path
-
-            except subprocess.CalledProcessError as ff_err:
-                logger.exception("ffmpeg failed to extract audio: %s", ff_err)
-                raise HTTPException(status_code=500, detail="Failed to extract audio from uploaded video")
-
-        # Hand off to Celery worker (import locally to avoid circular import)
-        from app.tasks.diarization import analyze_audio_task
-
-        task = analyze_audio_task.delay(
-            file_path=file_path,
-            meeting_id=meeting_id,
-            source_type=source_type,
-            audio_file_name=file.filename
-        )
-
-        return JSONResponse({
+        return {
             "status": "processing",
             "meeting_id": meeting_id,
             "task_id": task.id,
             "message": "Audio analysis started. Check status with task_id"
-        })
+        }
 
     except HTTPException:
         raise
@@ -141,29 +134,48 @@ async def analyze_meeting(file: UploadFile = File(...), meeting_id: str = None,
 
 
 @router.get("/analysis/{meeting_id}")
-async def get_analysis(meeting_id: str):
+async def get_analysis(
+    meeting_id: str,
+    meetings_collection=Depends(get_meetings_collection),
+    redis=Depends(get_redis)
+):
     """
-    Retrieve meeting analysis from MongoDB
+    Retrieve meeting analysis, served from the Redis cache when possible
     """
+    cache_key = analysis_cache_key(meeting_id)
+    
+    try:
+        cached = await redis.get(cache_key)
+        if cached is not None:
+            return Response(cached, media_type="application/json")
+    except RedisError:
+        logger.warning("Redis unavailable, reading analysis %s from MongoDB", meeting_id)
+    
     try:
         # Try to find by meeting_id first
-        analysis = meetings_collection.find_one({"meeting_id": meeting_id})
+        analysis = await meetings_collection.find_one({"meeting_id": meeting_id})
         
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
         
-        # Convert ObjectId to string
-        analysis["_id"] = str(analysis["_id"])
-
-        # Convert datetime fields to ISO strings for JSON
-        if "created_at" in analysis and hasattr(analysis["created_at"], "isoformat"):
-            analysis["created_at"] = analysis["created_at"].isoformat()
-
-        return JSONResponse({
-            "status": "success",
-            "data": analysis
-        })
+        # Validate through the prebuilt adapter; this also expands the stored
+        # struct-of-arrays segments back to one object per segment
+        analysis_id = str(analysis.pop("_id"))
+        data = MeetingAnalysisAdapter.dump_json(MeetingAnalysisAdapter.validate_python(analysis))
+
+        # pydantic-core encodes the model straight to JSON bytes; splice "_id" in as
+        # its last key and wrap it in the {"status", "data"} envelope
+        body = b'{"status":"success","data":' + data[:-1] + b',"_id":' + orjson.dumps(analysis_id) + b'}}'
+        
+        try:
+            await redis.set(cache_key, body, ex=ANALYSIS_CACHE_TTL)
+        except RedisError:
+            logger.warning("Could not cache analysis %s", meeting_id)
+        
+        return Response(body, media_type="application/json")
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -173,15 +185,13 @@ async def get_task_status(task_id: str):
     """
     Check Celery task status
     """
-    from app.tasks.celery_app import celery_app
-    
     task = celery_app.AsyncResult(task_id)
     
-    return JSONResponse({
+    return {
         "task_id": task_id,
         "status": task.status,
         "result": task.result if task.status == "SUCCESS" else None
-    })
+    }
 
 
 @router.websocket("/ws/live-class/{meeting_id}")
@@ -193,34 +203,65 @@ async def websocket_live_class(websocket: WebSocket, meeting_id: str):
     await websocket.accept()
     active_websockets[meeting_id] = websocket
     
+    # Chunks are appended to a file on disk so memory stays flat for long lectures
+    part_path = UPLOAD_DIR / f"{meeting_id}.live.part"
+    
+    # Initialize meeting session
+    session_data = {
+        "meeting_id": meeting_id,
+        "source_type": "live",
+        "container": None,
+        "chunk_count": 0,
+        "duration": 0
+    }
+    
+    last_ack = 0.0
+    
     try:
-        # Initialize meeting session
-        session_data = {
-            "meeting_id": meeting_id,
-            "source_type": "live",
-            "chunks": [],
-            "duration": 0
-        }
+        async with aiofiles.open(part_path, "wb") as buffer:
+            try:
+                while True:
+                    # Receive audio chunk
+                    data = await websocket.receive_bytes()
+                    
+                    if session_data["chunk_count"] == 0:
+                        session_data["container"] = sniff_container(data[:12])
+                    
+                    await buffer.write(data)
+                    session_data["chunk_count"] += 1
+                    
+                    # Acknowledge at most once per interval rather than per chunk
+                    now = time.monotonic()
+                    if now - last_ack > LIVE_ACK_INTERVAL:
+                        await websocket.send_json({
+                            "status": "chunk_received",
+                            "meeting_id": meeting_id,
+                            "chunk_count": session_data["chunk_count"]
+                        })
+                        last_ack = now
+            except WebSocketDisconnect:
+                logger.info("Client %s disconnected", meeting_id)
         
-        while True:
-            # Receive audio chunk
-            data = await websocket.receive_bytes()
-            
-            session_data["chunks"].append(data)
-            
-            # Send acknowledgment
-            await websocket.send_json({
-                "status": "chunk_received",
-                "meeting_id": meeting_id,
-                "chunk_count": len(session_data["chunks"])
-            })
+        if session_data["chunk_count"] == 0:
+            os.remove(part_path)
+            return
+        
+        # Hand the recorded session off to the Celery worker
+        file_path = part_path.with_name(f"{meeting_id}.{session_data['container'] or 'wav'}")
+        os.replace(part_path, file_path)
+        celery_app.send_task(ANALYZE_AUDIO_TASK, kwargs={
+            "file_path": str(file_path),
+            "meeting_id": meeting_id,
+            "source_type": session_data["source_type"],
+            "audio_file_name": file_path.name
+        })
     
-    except WebSocketDisconnect:
-        del active_websockets[meeting_id]
-        print(f"Client {meeting_id} disconnected")
-    except Exception as e:
-        print(f"WebSocket error: {str(e)}")
-        del active_websockets[meeting_id]
+    except Exception:
+        logger.exception("WebSocket error for %s", meeting_id)
+        if part_path.exists():
+            os.remove(part_path)
+    finally:
+        active_websockets.pop(meeting_id, None)
 
 
 @router.post("/finalize-live-session/{meeting_id}")
@@ -232,41 +273,64 @@ async def finalize_live_session(meeting_id: str):
         # Process the accumulated chunks
         # This would combine chunks and trigger analysis
         
-        return JSONResponse({
+        return {
             "status": "success",
             "message": f"Live session {meeting_id} finalized",
             "meeting_id": meeting_id
-        })
+        }
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _stream_analyses(first, cursor):
+    """
+    Encode analyses one document at a time as the cursor yields them, starting from
+    the already-fetched first document (None when there are no results)
+    Produces the same {"status", "data", "count"} envelope as a buffered response.
+    An error mid-stream aborts the response rather than closing a truncated
+    envelope as a success
+    """
+    yield b'{"status":"success","data":['
+    count = 0
+    if first is not None:
+        first["_id"] = str(first["_id"])
+        yield orjson.dumps(first)
+        count = 1
+        try:
+            async for analysis in cursor:
+                analysis["_id"] = str(analysis["_id"])
+                yield b"," + orjson.dumps(analysis)
+                count += 1
+        except Exception:
+            logger.exception("Error while streaming analyses")
+            raise
+    yield b'],"count":' + str(count).encode() + b"}"
+
+
 @router.get("/all-analyses")
-async def get_all_analyses(limit: int = 50):
+async def get_all_analyses(limit: int = 50, meetings_collection=Depends(get_meetings_collection)):
     """
-    Get all meeting analyses (paginated)
+    Get all meeting analyses (paginated), streamed as they are read from MongoDB
     """
     try:
-        analyses = list(meetings_collection.find().sort("created_at", -1).limit(limit))
+        # Large fields are left out of the list view; fetch /analysis/{meeting_id} for them
+        cursor = meetings_collection.find(
+            {}, projection={"segments": 0, "meeting_transcript": 0, "silence_segments": 0}
+        ).sort("created_at", -1).limit(limit)
         
-        for analysis in analyses:
-            analysis["_id"] = str(analysis["_id"])
-            if "created_at" in analysis and hasattr(analysis["created_at"], "isoformat"):
-                analysis["created_at"] = analysis["created_at"].isoformat()
-
-        return JSONResponse({
-            "status": "success",
-            "count": len(analyses),
-            "data": analyses
-        })
+        # find() is lazy: pull the first document now so connection and query
+        # errors still become a 500 before any of the body is sent
+        first = await anext(cursor, None)
+        
+        return StreamingResponse(_stream_analyses(first, cursor), media_type="application/json")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/analysis-report/{meeting_id}")
-async def get_analysis_report(meeting_id: str):
+async def get_analysis_report(meeting_id: str, meetings_collection=Depends(get_meetings_collection)):
     """
     Generate a comprehensive analysis report for a meeting
     """
@@ -274,26 +338,30 @@ async def get_analysis_report(meeting_id: str):
         from app.tasks.report_generator import AnalysisReportGenerator
         
         # Get analysis from database
-        analysis = meetings_collection.find_one({"meeting_id": meeting_id})
+        analysis = await meetings_collection.find_one({"meeting_id": meeting_id})
         
         if not analysis:
             raise HTTPException(status_code=404, detail="Analysis not found")
         
-        # Remove MongoDB _id and convert datetime
+        # Remove MongoDB _id
         if "_id" in analysis:
             del analysis["_id"]
-        if "created_at" in analysis and hasattr(analysis["created_at"], "isoformat"):
-            analysis["created_at"] = analysis["created_at"].isoformat()
+        
+        # The report reads per-speaker fields as attributes
+        analysis["speaker_analysis"] = {
+            speaker_id: SpeakerAnalysisAdapter.validate_python(speaker)
+            for speaker_id, speaker in analysis.get("speaker_analysis", {}).items()
+        }
         
         # Generate report
         report_generator = AnalysisReportGenerator()
         report_text = report_generator.generate_full_report(analysis)
         
-        return JSONResponse({
+        return {
             "status": "success",
             "meeting_id": meeting_id,
             "report": report_text
-        })
+        }
     
     except HTTPException:
         raise
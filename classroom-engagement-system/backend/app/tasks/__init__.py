@@ -1,14 +1,25 @@
 """
 Task processing modules for meeting analysis
+
+Analysis services are imported lazily (PEP 562) so that importing
+``app.tasks`` from the API process does not pull in torch, pyannote,
+faster-whisper or transformers.
 """
 
+import importlib
+
 from app.tasks.celery_app import celery_app
-from app.tasks.diarization import analyze_audio_task, DiarizationService
-from app.tasks.filler_detection import FillerWordDetector
-from app.tasks.silence_detection import SilenceDetector
-from app.tasks.speech_to_text import SpeechToTextService
-from app.tasks.sentiment_analysis import SentimentToneAnalyzer
-from app.tasks.report_generator import AnalysisReportGenerator
+
+# Public name -> module that defines it
+_LAZY_IMPORTS = {
+    'analyze_audio_task': 'app.tasks.diarization',
+    'DiarizationService': 'app.tasks.diarization',
+    'FillerWordDetector': 'app.tasks.filler_detection',
+    'SilenceDetector': 'app.tasks.silence_detection',
+    'SpeechToTextService': 'app.tasks.speech_to_text',
+    'SentimentToneAnalyzer': 'app.tasks.sentiment_analysis',
+    'AnalysisReportGenerator': 'app.tasks.report_generator',
+}
 
 __all__ = [
     'celery_app',
@@ -20,3 +31,12 @@ __all__ = [
     'SentimentToneAnalyzer',
     'AnalysisReportGenerator',
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        module = importlib.import_module(_LAZY_IMPORTS[name])
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,75 @@
+"""
+Compiled kernels for diarization metrics
+Declared with explicit signatures so they compile (or load from the on-disk cache)
+at import, not on the first task
+"""
+
+import numba
+import numpy as np
+
+
+@numba.njit("float64[:](float64[:])", cache=True)
+def _participation(talk_times):
+    """Each speaker's share of the total talk time, in percent"""
+    total = talk_times.sum()
+    if total <= 0:
+        return np.zeros_like(talk_times)
+    return talk_times / total * 100
+
+
+@numba.njit(
+    "Tuple((float64[:], float64[:], int64[:], int64))(float64[:], float64[:], int64[:], int64)",
+    cache=True,
+)
+def engagement_kernel(starts, ends, speaker_idx, n_speakers):
+    """
+    Fused pass over the segments: talk time, participation percentage and segment
+    count per speaker, plus the number of speaker switches
+    """
+    talk_times = np.zeros(n_speakers)
+    turn_counts = np.zeros(n_speakers, np.int64)
+    switches = 0
+    for i in range(speaker_idx.size):
+        talk_times[speaker_idx[i]] += ends[i] - starts[i]
+        turn_counts[speaker_idx[i]] += 1
+        if i > 0 and speaker_idx[i] != speaker_idx[i - 1]:
+            switches += 1
+    return talk_times, _participation(talk_times), turn_counts, switches
+
+
+# Segment count above which engagement_kernel_parallel pays for its thread dispatch
+PARALLEL_MIN_SEGMENTS = 500
+
+# Fixed number of partial histograms, so the sums do not depend on the thread count
+_PARALLEL_CHUNKS = 64
+
+
+@numba.njit(
+    "Tuple((float64[:], float64[:], int64[:], int64))(float64[:], float64[:], int64[:], int64)",
+    cache=True,
+    parallel=True,
+)
+def engagement_kernel_parallel(starts, ends, speaker_idx, n_speakers):
+    """
+    engagement_kernel for long meetings: each chunk of segments fills its own
+    talk-time/segment-count histogram in parallel, and the chunks are then reduced
+    """
+    n = speaker_idx.size
+    chunk_size = (n + _PARALLEL_CHUNKS - 1) // _PARALLEL_CHUNKS
+    chunk_talk = np.zeros((_PARALLEL_CHUNKS, n_speakers))
+    chunk_counts = np.zeros((_PARALLEL_CHUNKS, n_speakers), np.int64)
+    switches = 0
+    for c in numba.prange(_PARALLEL_CHUNKS):
+        lo = c * chunk_size
+        hi = min(lo + chunk_size, n)
+        for i in range(lo, hi):
+            chunk_talk[c, speaker_idx[i]] += ends[i] - starts[i]
+            chunk_counts[c, speaker_idx[i]] += 1
+            if i > 0 and speaker_idx[i] != speaker_idx[i - 1]:
+                switches += 1
+    talk_times = np.zeros(n_speakers)
+    turn_counts = np.zeros(n_speakers, np.int64)
+    for c in range(_PARALLEL_CHUNKS):
+        talk_times += chunk_talk[c]
+        turn_counts += chunk_counts[c]
+    return talk_times, _participation(talk_times), turn_counts, switches
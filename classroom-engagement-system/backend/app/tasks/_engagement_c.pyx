@@ -0,0 +1,44 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Compiled alternative to app.tasks._diarization_kernels.engagement_kernel with the
+same arguments and results, used for the serial (short-meeting) path when built
+
+Built in place by the Docker image; elsewhere run, from backend/:
+    cythonize -i app/tasks/_engagement_c.pyx
+When the extension is not built, the Numba kernel is used instead
+"""
+
+import numpy as np
+
+
+def engagement_kernel(
+    const double[:] starts,
+    const double[:] ends,
+    const long long[:] speaker_idx,
+    Py_ssize_t n_speakers
+):
+    """
+    Fused pass over the segments: talk time, participation percentage and segment
+    count per speaker, plus the number of speaker switches
+    """
+    talk_times = np.zeros(n_speakers)
+    turn_counts = np.zeros(n_speakers, np.int64)
+    cdef double[:] talk = talk_times
+    cdef long long[:] counts = turn_counts
+    cdef Py_ssize_t i, k
+    cdef long long switches = 0
+    cdef double total = 0.0
+
+    for i in range(speaker_idx.shape[0]):
+        talk[speaker_idx[i]] += ends[i] - starts[i]
+        counts[speaker_idx[i]] += 1
+        if i > 0 and speaker_idx[i] != speaker_idx[i - 1]:
+            switches += 1
+    for k in range(n_speakers):
+        total += talk[k]
+
+    if total > 0:
+        participation = talk_times / total * 100
+    else:
+        participation = np.zeros(n_speakers)
+    return talk_times, participation, turn_counts, switches
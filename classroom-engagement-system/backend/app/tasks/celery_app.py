@@ -1,19 +1,107 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from celery import Celery
-from app.config import settings
+from celery.signals import after_setup_logger, worker_process_init, worker_process_shutdown
+from app.config import get_settings
 
 celery_app = Celery(
     "classroom_engagement",
-    broker=settings.celery_broker_url,
-    backend=settings.celery_result_backend,
     include=["app.tasks.diarization"]
 )
 
+
+def _connection_settings():
+    """Broker and result backend URLs, read when Celery first needs its configuration"""
+    settings = get_settings()
+    return {
+        "broker_url": settings.celery_broker_url,
+        "result_backend": settings.celery_result_backend,
+    }
+
+
+celery_app.add_defaults(_connection_settings)
+
 celery_app.conf.update(
     task_serializer="json",
     accept_content=["json"],
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    # Each pool process loads the analysis models in worker_process_init (below)
+    # before reporting up; the 4 s default would kill it mid-load
+    worker_proc_alive_timeout=300,
 )
 
 # Tasks are loaded via the `include` setting above to avoid circular imports.
+
+logger = logging.getLogger(__name__)
+
+
+# Handlers Celery configured, drained by a listener thread so tasks never block on terminal I/O
+_log_handlers = []
+_log_listener = None
+
+
+def _start_log_listener():
+    """Point the root logger at a fresh queue and start a listener thread for it"""
+    global _log_listener
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    _log_listener = QueueListener(log_queue, *_log_handlers, respect_handler_level=True)
+    _log_listener.start()
+
+
+def _stop_log_listener():
+    """Flush queued records and stop the listener thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+@after_setup_logger.connect
+def use_queue_logging(logger, **kwargs):
+    """Move Celery's root handlers behind a queue"""
+    _log_handlers[:] = logger.handlers
+    if not _log_handlers:
+        return
+    for handler in _log_handlers:
+        logger.removeHandler(handler)
+    _start_log_listener()
+    atexit.register(_stop_log_listener)
+
+
+# Shared analysis services, populated once per worker process
+celery_app.services = None
+
+
+@worker_process_init.connect
+def load_analysis_services(**kwargs):
+    """Load the heavy analysis models once per worker process, before the first task"""
+    # The listener thread does not survive fork; each pool process runs its own
+    if _log_handlers:
+        _start_log_listener()
+    import audioread
+    from app.tasks.diarization import get_diarization_service, get_diarization_pipeline
+    get_diarization_service()
+    # Probe decoders now; audioread caches the list for librosa's fallback loads
+    audioread.available_backends()
+    try:
+        get_diarization_pipeline()
+    except Exception as e:
+        # The first task retries the load and fails if the pipeline still cannot load
+        logger.warning("Could not preload diarization pipeline: %s", e)
+
+
+@worker_process_shutdown.connect
+def close_analysis_services(**kwargs):
+    """Close the shared MongoDB and Redis connections when the worker process exits"""
+    if celery_app.services is not None:
+        celery_app.services.diarizer.close_connection()
+    _stop_log_listener()
@@ -1,29 +1,220 @@
+import array
+import logging
 import os
-import librosa
+import shutil
+import subprocess
+import threading
+from contextlib import nullcontext
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Final
 import numpy as np
-from typing import List, Dict, Tuple
-from datetime import datetime
-from pymongo import MongoClient
-from app.config import settings
+import soundfile as sf
+import soxr
+from collections.abc import Sequence
+from typing import Iterable, List, Dict, NamedTuple, Optional, Tuple, Union
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import ConnectionFailure
+from pymongo.write_concern import WriteConcern
+from redis import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError, RedisError
+from app.config import get_settings
 from app.models.meeting import (
     SpeakerSegment, MeetingAnalysis, SourceType, 
-    SilenceSegment, SpeakerAnalysis
+    SilenceSegment, SpeakerAnalysis, SegmentArrays, MeetingAnalysisAdapter
 )
 from app.tasks.celery_app import celery_app
+from app.utils.cache import analysis_cache_key
 from app.tasks.filler_detection import FillerWordDetector
 from app.tasks.silence_detection import SilenceDetector
 from app.tasks.speech_to_text import SpeechToTextService
 from app.tasks.sentiment_analysis import SentimentToneAnalyzer
 from app.tasks.speaker_enhancement import SpeakerEnhancer
+from app.tasks._diarization_kernels import PARALLEL_MIN_SEGMENTS, engagement_kernel_parallel
+
+try:
+    # Prebuilt C alternative to the serial Numba kernel (see _engagement_c.pyx), built
+    # by the Docker image; same results. Numba is still imported for the parallel
+    # kernel and the other analysis modules, so this does not avoid that import
+    from app.tasks._engagement_c import engagement_kernel
+except ImportError:
+    from app.tasks._diarization_kernels import engagement_kernel
+
+logger = logging.getLogger(__name__)
+
+# Every stage of the pipeline works on mono audio at this rate
+SAMPLE_RATE = 16000
+
+# Container extensions whose audio track must be extracted before analysis
+VIDEO_EXTENSIONS: Final[frozenset[str]] = frozenset({".mp4", ".webm", ".ogg", ".mkv"})
+
+# Mock speaker turns for development/testing with 4 speakers, built once without
+# validation; callers only read them, so every call shares the same segments
+_MOCK_SEGMENTS: Final[Tuple[SpeakerSegment, ...]] = (
+    # Speaker 1
+    SpeakerSegment.model_construct(start=0.0, end=8.5, speaker_id="Speaker_1", confidence=0.95),
+    SpeakerSegment.model_construct(start=25.0, end=32.0, speaker_id="Speaker_1", confidence=0.94),
+    SpeakerSegment.model_construct(start=55.0, end=68.0, speaker_id="Speaker_1", confidence=0.93),
+    
+    # Speaker 2
+    SpeakerSegment.model_construct(start=8.5, end=18.0, speaker_id="Speaker_2", confidence=0.96),
+    SpeakerSegment.model_construct(start=32.0, end=42.5, speaker_id="Speaker_2", confidence=0.94),
+    SpeakerSegment.model_construct(start=68.0, end=78.0, speaker_id="Speaker_2", confidence=0.92),
+    
+    # Speaker 3
+    SpeakerSegment.model_construct(start=18.0, end=25.0, speaker_id="Speaker_3", confidence=0.93),
+    SpeakerSegment.model_construct(start=42.5, end=50.0, speaker_id="Speaker_3", confidence=0.95),
+    SpeakerSegment.model_construct(start=78.0, end=85.0, speaker_id="Speaker_3", confidence=0.91),
+    
+    # Speaker 4
+    SpeakerSegment.model_construct(start=50.0, end=55.0, speaker_id="Speaker_4", confidence=0.92),
+    SpeakerSegment.model_construct(start=85.0, end=95.0, speaker_id="Speaker_4", confidence=0.94),
+)
+
+
+class EngagementMetrics(NamedTuple):
+    """
+    Engagement metrics over a meeting's segments, per-speaker values as arrays
+    aligned with speaker_labels (first-appearance order)
+    Indexing by the legacy dict keys builds that dict view on demand
+    """
+    speaker_labels: Tuple[str, ...]
+    talk_time: np.ndarray
+    participation: np.ndarray
+    turn_counts: np.ndarray
+    turn_taking_frequency: float
+    engagement_score: float
+
+    def __getitem__(self, key):
+        if not isinstance(key, str):
+            return tuple.__getitem__(self, key)
+        if key == "speaker_talk_time":
+            return dict(zip(self.speaker_labels, self.talk_time.tolist()))
+        if key == "speaker_participation":
+            return {label: round(p, 2) for label, p in zip(self.speaker_labels, self.participation.tolist())}
+        if key == "turn_count_per_speaker":
+            return dict(zip(self.speaker_labels, self.turn_counts.tolist()))
+        if key in ("turn_taking_frequency", "engagement_score"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def as_dict(self) -> Dict:
+        """The metrics in the legacy dict form"""
+        return {
+            key: self[key]
+            for key in (
+                "speaker_talk_time", "speaker_participation", "turn_taking_frequency",
+                "engagement_score", "turn_count_per_speaker"
+            )
+        }
+
+
+@lru_cache(maxsize=256)
+def _engagement_score(talk_times: Tuple[float, ...], duration: float, turns: int) -> float:
+    """
+    Engagement score (0-100) from per-speaker talk times, meeting duration and the
+    number of speaker switches; cached, as repolled meetings repeat the same inputs
+    """
+    # Based on turn-taking frequency and participation balance
+    turn_taking_frequency = (turns / (duration / 60)) if duration > 0 else 0
+    
+    # Balance: 1 minus the coefficient of variation of talk time, floored at 0.
+    # A single speaker has no one to balance against
+    talk = np.asarray(talk_times)
+    mean_talk = talk.mean() if talk.size > 1 else 0.0
+    balance = max(0.0, 1.0 - talk.std() / mean_talk) if mean_talk > 0 else 0.0
+    
+    # Half the score each: balance, and turn-taking up to 10 switches per minute
+    turn_score = min(turn_taking_frequency, 10) / 10
+    return round(float(balance * 50 + turn_score * 50), 2)
+
+
+# MongoDB client shared by every task in the worker process, created after fork
+_MONGO_CLIENT = None
+
+
+def get_mongo_client() -> MongoClient:
+    """Return the process-wide MongoClient so its connection pool is reused across tasks"""
+    global _MONGO_CLIENT
+    if _MONGO_CLIENT is None:
+        _MONGO_CLIENT = MongoClient(get_settings().mongodb_url, maxPoolSize=50)
+    return _MONGO_CLIENT
+
+
+# pyannote pipeline shared by every task in the worker process, loaded on first use
+_PIPELINE = None
+_PIPELINE_LOCK = threading.Lock()
+
+
+def get_diarization_pipeline():
+    """
+    Return the process-wide pyannote pipeline, loading it once
+    Double-checked under a lock so concurrent callers never load the weights twice
+    """
+    global _PIPELINE
+    if _PIPELINE is None:
+        with _PIPELINE_LOCK:
+            if _PIPELINE is None:
+                import torch
+                from pyannote.audio import Pipeline
+                
+                pipeline = Pipeline.from_pretrained(
+                    "pyannote/speaker-diarization-3.1",
+                    use_auth_token=True
+                )
+                _PIPELINE = pipeline.to(torch.device("cuda" if torch.cuda.is_available() else "cpu"))
+    return _PIPELINE
+
+
+def extract_audio_from_video(file_path: str) -> str:
+    """
+    Extract the audio track of a video to a mono 16kHz WAV using ffmpeg
+    Removes the original video and returns the path of the extracted audio
+    """
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError("Server missing ffmpeg to extract audio from video")
+
+    audio_path = os.path.splitext(file_path)[0] + ".wav"
+    logger.info("Extracting audio from video %s to %s", file_path, audio_path)
+
+    try:
+        # Convert to mono 16kHz WAV which the diarization expects
+        subprocess.run([
+            "ffmpeg",
+            "-y",
+            "-i",
+            file_path,
+            "-ar",
+            str(SAMPLE_RATE),
+            "-ac",
+            "1",
+            audio_path
+        ], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError as ff_err:
+        raise RuntimeError(f"Failed to extract audio from uploaded video: {ff_err}")
+
+    # remove original video to save space
+    try:
+        os.remove(file_path)
+    except OSError:
+        logger.warning("Could not remove original uploaded video: %s", file_path)
+
+    return audio_path
 
 
 class DiarizationService:
     """Service for speaker diarization using pyannote.audio with enhanced analysis"""
     
     def __init__(self):
-        self.mongodb_client = MongoClient(settings.mongodb_url)
+        settings = get_settings()
+        self.mongodb_client = get_mongo_client()
         self.db = self.mongodb_client[settings.db_name]
-        self.meetings_collection = self.db["meetings"]
+        # Analyses are reproducible from the upload, so writes skip the journal wait
+        self.meetings_collection = self.db.get_collection(
+            "meetings", write_concern=WriteConcern(w=1, j=False)
+        )
+        self.redis_client = Redis.from_url(settings.redis_url)
         self.filler_detector = FillerWordDetector()
         self.silence_detector = SilenceDetector()
         self.stt_service = SpeechToTextService(model_size="base")
@@ -31,63 +222,74 @@ class DiarizationService:
         self.speaker_enhancer = SpeakerEnhancer()
         
     def load_audio(self, file_path: str) -> Tuple[np.ndarray, int]:
-        """Load audio file and return waveform and sample rate"""
-        y, sr = librosa.load(file_path, sr=16000)
-        return y, sr
+        """
+        Load audio file as mono float32 at 16 kHz and return waveform and sample rate
+        Resamples only when the file is not already at 16 kHz
+        """
+        try:
+            y, native_sr = sf.read(file_path, dtype="float32")
+        except sf.LibsndfileError:
+            # Containers libsndfile cannot decode (e.g. m4a) go through librosa's audioread path
+            import librosa
+            y, native_sr = librosa.load(file_path, sr=None, mono=True)
+        
+        if y.ndim == 2:
+            y = y.mean(axis=1)
+        if native_sr != SAMPLE_RATE:
+            y = soxr.resample(y, native_sr, SAMPLE_RATE, quality="HQ")
+        return y, SAMPLE_RATE
     
-    def perform_diarization(self, audio_file_path: str) -> List[SpeakerSegment]:
+    def perform_diarization(self, y: np.ndarray, sr: int) -> List[SpeakerSegment]:
         """
         Perform advanced speaker diarization using pyannote.audio
         Enhanced to better detect multiple speakers (3+)
+        Takes the already-loaded waveform so pyannote does not decode the file again
         Returns a list of SpeakerSegment objects
         """
         try:
-            from pyannote.audio import Pipeline
-            from huggingface_hub import login
-            
-            # Initialize pipeline with better parameters for multi-speaker detection
-            pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=True
-            )
+            import torch
             
-            # Configure for better multi-speaker detection
-            # Lower threshold = more speakers detected
-            pipeline.to("cuda") if hasattr(pipeline, 'to') else None
+            pipeline = get_diarization_pipeline()
             
             # Process audio with enhanced settings
-            diarization = pipeline(audio_file_path)
+            waveform = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32)).unsqueeze(0)
             
-            # Convert diarization output to SpeakerSegment objects
-            segments = []
-            speaker_count = {}
+            # On GPU the segmentation and embedding models run under FP16 autocast
+            autocast = (
+                torch.autocast("cuda", dtype=torch.float16)
+                if torch.cuda.is_available() else nullcontext()
+            )
+            with torch.inference_mode(), autocast:
+                diarization = pipeline({"waveform": waveform, "sample_rate": sr})
             
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                segment = SpeakerSegment(
+            # Convert diarization output to SpeakerSegment objects;
+            # pyannote output is trusted, so per-turn validation is skipped
+            segments = [
+                SpeakerSegment.model_construct(
                     start=turn.start,
                     end=turn.end,
                     speaker_id=speaker,
                     confidence=0.95  # High confidence from pyannote
                 )
-                segments.append(segment)
-                
-                # Track speaker count
-                if speaker not in speaker_count:
-                    speaker_count[speaker] = 0
-                speaker_count[speaker] += 1
+                for turn, _, speaker in diarization.itertracks(yield_label=True)
+            ]
             
             # Merge very short segments (noise reduction)
             segments = self._merge_short_segments(segments, min_duration=0.5)
             
             # Validate we have multiple speakers
             unique_speakers = len(set(s.speaker_id for s in segments))
-            print(f"Detected {unique_speakers} unique speakers")
+            logger.info("Detected %d unique speakers", unique_speakers)
             
             return segments
         
-        except Exception as e:
-            print(f"Diarization error: {str(e)}")
-            # Fallback: Create mock segments for development
+        except (ImportError, FileNotFoundError) as e:
+            # Fallback for development only: pyannote or its weights are not installed.
+            # Anything else (auth, CUDA OOM, bad audio) fails the task instead of
+            # running the whole analysis on placeholder speaker turns
+            if not get_settings().allow_mock_diarization:
+                raise
+            logger.warning("Diarization unavailable, using mock segments: %s", e)
             return self._create_mock_segments()
     
     def _merge_short_segments(self, segments: List[SpeakerSegment], min_duration: float = 0.5) -> List[SpeakerSegment]:
@@ -120,97 +322,94 @@ class DiarizationService:
     
     def _create_mock_segments(self) -> List[SpeakerSegment]:
         """Create realistic mock segments for development/testing with 4 speakers"""
-        segments = [
-            # Speaker 1
-            SpeakerSegment(start=0.0, end=8.5, speaker_id="Speaker_1", confidence=0.95),
-            SpeakerSegment(start=25.0, end=32.0, speaker_id="Speaker_1", confidence=0.94),
-            SpeakerSegment(start=55.0, end=68.0, speaker_id="Speaker_1", confidence=0.93),
-            
-            # Speaker 2
-            SpeakerSegment(start=8.5, end=18.0, speaker_id="Speaker_2", confidence=0.96),
-            SpeakerSegment(start=32.0, end=42.5, speaker_id="Speaker_2", confidence=0.94),
-            SpeakerSegment(start=68.0, end=78.0, speaker_id="Speaker_2", confidence=0.92),
-            
-            # Speaker 3 (NEW)
-            SpeakerSegment(start=18.0, end=25.0, speaker_id="Speaker_3", confidence=0.93),
-            SpeakerSegment(start=42.5, end=50.0, speaker_id="Speaker_3", confidence=0.95),
-            SpeakerSegment(start=78.0, end=85.0, speaker_id="Speaker_3", confidence=0.91),
-            
-            # Speaker 4 (NEW)
-            SpeakerSegment(start=50.0, end=55.0, speaker_id="Speaker_4", confidence=0.92),
-            SpeakerSegment(start=85.0, end=95.0, speaker_id="Speaker_4", confidence=0.94),
-        ]
-        return segments
+        return list(_MOCK_SEGMENTS)
     
     def calculate_engagement_metrics(
         self, 
-        segments: List[SpeakerSegment], 
+        segments: Union[Iterable[SpeakerSegment], MeetingAnalysis], 
         duration: float
-    ) -> Dict:
-        """Calculate engagement metrics from speaker segments"""
+    ) -> EngagementMetrics:
+        """
+        Calculate engagement metrics from speaker segments
+        A MeetingAnalysis can be passed instead to reuse its cached segment arrays,
+        and segments can also arrive as any iterable (e.g. a generator)
+        """
         
-        # Calculate talk time per speaker
-        speaker_talk_time = {}
-        turn_count_per_speaker = {}
-        for segment in segments:
-            speaker_id = segment.speaker_id
-            talk_time = segment.end - segment.start
-            
-            if speaker_id not in speaker_talk_time:
-                speaker_talk_time[speaker_id] = 0
-                turn_count_per_speaker[speaker_id] = 0
-            
-            speaker_talk_time[speaker_id] += talk_time
-            turn_count_per_speaker[speaker_id] += 1
+        # Calculate talk time per speaker over struct-of-arrays NumPy columns, read
+        # straight off the segments without building a validated SegmentArrays
+        if isinstance(segments, MeetingAnalysis):
+            starts, ends, speaker_ids = segments.segment_arrays
+        elif not isinstance(segments, Sequence):
+            # Stream once into packed double buffers, so each segment object can be
+            # released as soon as it has been read
+            start_buf, end_buf, labels = array.array('d'), array.array('d'), []
+            for s in segments:
+                start_buf.append(s.start)
+                end_buf.append(s.end)
+                labels.append(s.speaker_id)
+            starts = np.frombuffer(start_buf, dtype=np.float64)
+            ends = np.frombuffer(end_buf, dtype=np.float64)
+            speaker_ids = np.array(labels)
+        else:
+            count = len(segments)
+            starts = np.fromiter((s.start for s in segments), dtype=np.float64, count=count)
+            ends = np.fromiter((s.end for s in segments), dtype=np.float64, count=count)
+            speaker_ids = np.array([s.speaker_id for s in segments])
+        return self.calculate_engagement_metrics_arrays(starts, ends, speaker_ids, duration)
+    
+    def calculate_engagement_metrics_arrays(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        speaker_ids: np.ndarray,
+        duration: float
+    ) -> EngagementMetrics:
+        """
+        Calculate engagement metrics from parallel segment arrays (float64 starts and
+        ends, one speaker label per segment), skipping SpeakerSegment entirely
+        """
+        count = len(starts)
+        speaker_labels, first_index, speaker_idx = np.unique(
+            speaker_ids, return_index=True, return_inverse=True
+        )
         
-        # Calculate participation percentage
-        speaker_participation = {}
-        total_talk_time = sum(speaker_talk_time.values())
+        # Long meetings build the per-speaker histograms in parallel
+        kernel = engagement_kernel_parallel if count > PARALLEL_MIN_SEGMENTS else engagement_kernel
+        talk_times, percentages, turn_counts, turn_count = kernel(
+            starts, ends, speaker_idx.astype(np.int64).ravel(), len(speaker_labels)
+        )
         
-        for speaker_id, talk_time in speaker_talk_time.items():
-            percentage = (talk_time / total_talk_time * 100) if total_talk_time > 0 else 0
-            speaker_participation[speaker_id] = round(percentage, 2)
+        # Keep first-appearance order of speakers in the output. Participation
+        # percentage (share of total talk time) comes from the kernel
+        order = np.argsort(first_index)
         
         # Calculate turn-taking frequency (speaker switches per minute)
-        turn_count = 0
-        if len(segments) > 1:
-            for i in range(len(segments) - 1):
-                if segments[i].speaker_id != segments[i + 1].speaker_id:
-                    turn_count += 1
-        
         turn_taking_frequency = (turn_count / (duration / 60)) if duration > 0 else 0
         
-        # Calculate engagement score (0-100)
-        # Based on turn-taking frequency and participation balance
-        max_participation = max(speaker_participation.values()) if speaker_participation else 0
-        balance_score = 100 - abs(100 - max_participation)
-        turn_score = min(100, (turn_taking_frequency / 2) * 100)  # Normalize to 0-100
-        engagement_score = (balance_score * 0.4 + turn_score * 0.6)
-        
-        return {
-            "speaker_talk_time": speaker_talk_time,
-            "speaker_participation": speaker_participation,
-            "turn_taking_frequency": round(turn_taking_frequency, 2),
-            "engagement_score": round(engagement_score, 2),
-            "turn_count_per_speaker": turn_count_per_speaker
-        }
+        return EngagementMetrics(
+            speaker_labels=tuple(speaker_labels[order].tolist()),
+            talk_time=talk_times[order],
+            participation=percentages[order],
+            turn_counts=turn_counts[order],
+            turn_taking_frequency=round(turn_taking_frequency, 2),
+            engagement_score=_engagement_score(tuple(talk_times.tolist()), duration, turn_count)
+        )
     
     def perform_comprehensive_analysis(
         self,
         y: np.ndarray,
         sr: int,
         segments: List[SpeakerSegment],
-        audio_file_path: str,
-        duration: float
+        duration: float,
+        transcript_result: Optional[Dict] = None
     ) -> Dict:
         """
         Perform comprehensive analysis including transcription, fillers, silence, and sentiment
         Enhanced with speaker detection improvement
+        A transcript produced alongside diarization can be passed in to skip transcription here
         """
-        analysis_data = {}
-        
         # 0. ENHANCE SPEAKER DETECTION FOR 3+ SPEAKERS
-        print("Enhancing speaker detection algorithm...")
+        logger.info("Enhancing speaker detection algorithm...")
         segments_dict = [s.model_dump() for s in segments]
         enhanced_segments = self.speaker_enhancer.enhance_speaker_segments(
             segments_dict,
@@ -219,7 +418,7 @@ class DiarizationService:
         
         # Get speaker summary
         speaker_summary = self.speaker_enhancer.get_speaker_summary(enhanced_segments)
-        print(f"Speaker summary: {speaker_summary}")
+        logger.debug("Speaker summary: %s", speaker_summary)
         
         # Convert enhanced segments back to SpeakerSegment objects
         segments = [
@@ -228,16 +427,22 @@ class DiarizationService:
         ]
         
         # 1. Speech-to-text
-        print("Performing speech-to-text transcription...")
-        transcript_result = self.stt_service.transcribe_audio(audio_file_path)
+        # Whisper reads the waveform already in memory (loaded at 16 kHz) instead of
+        # decoding the file from disk a second time
+        if transcript_result is None:
+            logger.info("Performing speech-to-text transcription...")
+            transcript_result = self.stt_service.transcribe_audio(y)
         transcript_segments = transcript_result.get('segments', [])
         full_transcript = transcript_result.get('full_transcript', '')
         
         # 2. Match transcripts to speakers
-        print("Matching transcripts to speakers...")
-        speaker_segments_with_transcripts = self.stt_service.match_transcript_to_speakers(
-            transcript_segments, 
-            [s.model_dump() for s in segments]
+        logger.info("Matching transcripts to speakers...")
+        segment_arrays = SegmentArrays.from_segments(segments)
+        speaker_segments_with_transcripts = self.stt_service.match_transcript_to_speakers_soa(
+            transcript_segments,
+            np.asarray(segment_arrays.start),
+            np.asarray(segment_arrays.end),
+            segment_arrays.speaker_id
         )
         
         # 3. Get speaker transcripts
@@ -246,31 +451,30 @@ class DiarizationService:
         )
         
         # 4. Filler word detection
-        print("Detecting filler words...")
-        filler_by_speaker = []
-        for speaker_id, trans_data in speaker_transcripts.items():
-            transcript = trans_data['full_transcript']
-            filler_analysis = self.filler_detector.detect_fillers_from_transcript(
-                transcript, speaker_id
-            )
-            filler_by_speaker.append({
-                'speaker_id': speaker_id,
-                **filler_analysis
-            })
+        logger.info("Detecting filler words...")
+        speaker_texts = [
+            (trans_data['full_transcript'], speaker_id)
+            for speaker_id, trans_data in speaker_transcripts.items()
+        ]
+        filler_by_speaker = self.filler_detector.detect_fillers_batch(speaker_texts)
         
         filler_summary = self.filler_detector.analyze_all_fillers(filler_by_speaker)
         
         # 5. Silence/pause detection
-        print("Detecting silences and pauses...")
+        logger.info("Detecting silences and pauses...")
+        # One spectral pass over the recording; each segment then slices its frames
+        frame_duration, levels = self.silence_detector.compute_frame_levels(y, sr)
+        
         silence_by_speaker = []
-        silence_segments = []
         for segment in segments:
-            silence_data = self.silence_detector.detect_silence_in_segment(
-                y, sr, segment.start, segment.end
+            silence_data = self.silence_detector.detect_silence_from_levels(
+                frame_duration, levels, segment.start, segment.end
             )
             silence_data['speaker_id'] = segment.speaker_id
             silence_by_speaker.append(silence_data)
-            
+        
+        silence_segments = []
+        for silence_data in silence_by_speaker:
             for sil_seg in silence_data.get('silence_segments', []):
                 silence_segments.append(SilenceSegment(
                     start=sil_seg['start'],
@@ -281,69 +485,55 @@ class DiarizationService:
         pause_summary = self.silence_detector.analyze_pauses_by_speaker(silence_by_speaker)
         
         # 6. Sentiment and tone analysis
-        print("Analyzing sentiment and tone...")
-        sentiment_by_speaker = []
-        for speaker_id, trans_data in speaker_transcripts.items():
-            transcript = trans_data['full_transcript']
-            sentiment = self.sentiment_analyzer.analyze_speaker_sentiment(
-                transcript, speaker_id
-            )
-            sentiment_by_speaker.append(sentiment)
+        logger.info("Analyzing sentiment and tone...")
+        sentiment_by_speaker = self.sentiment_analyzer.analyze_speakers_batch(speaker_texts)
         
         sentiment_summary = self.sentiment_analyzer.analyze_all_speakers_sentiment(
             sentiment_by_speaker
         )
         
         # 7. Generate comprehensive per-speaker analysis
+        # Talk time, participation and turn counts come from the vectorized metrics,
+        # computed over the enhanced segments since enhancement can relabel speakers
         speaker_analysis = {}
-        speaker_talk_time = {}
-        for segment in segments:
-            speaker_id = segment.speaker_id
-            talk_time = segment.end - segment.start
-            if speaker_id not in speaker_talk_time:
-                speaker_talk_time[speaker_id] = 0
-            speaker_talk_time[speaker_id] += talk_time
-        
-        total_talk_time = sum(speaker_talk_time.values())
-        
-        for segment in segments:
-            speaker_id = segment.speaker_id
+        speaker_metrics = self.calculate_engagement_metrics(segments, duration)
+        speaker_talk_time = speaker_metrics['speaker_talk_time']
+        speaker_participation = speaker_metrics['speaker_participation']
+        turn_count_per_speaker = speaker_metrics['turn_count_per_speaker']
+        
+        # Index the per-speaker results once; silence results are per segment and the
+        # speaker's first segment is used, hence the reversed build
+        filler_by_sid = {f['speaker_id']: f for f in filler_by_speaker}
+        silence_by_sid = {s['speaker_id']: s for s in reversed(silence_by_speaker)}
+        sentiment_by_sid = {s['speaker_id']: s for s in sentiment_by_speaker}
+        
+        # Speakers in order of first appearance
+        for speaker_id in speaker_talk_time:
+            # Get speaker-specific data
+            trans_data = speaker_transcripts.get(speaker_id, {})
+            filler_data = filler_by_sid.get(speaker_id, {})
+            silence_data = silence_by_sid.get(speaker_id, {})
+            sentiment_data = sentiment_by_sid.get(speaker_id, {})
             
-            if speaker_id not in speaker_analysis:
-                # Get speaker-specific data
-                trans_data = speaker_transcripts.get(speaker_id, {})
-                filler_data = next((f for f in filler_by_speaker if f['speaker_id'] == speaker_id), {})
-                silence_data = next((s for s in silence_by_speaker if s['speaker_id'] == speaker_id), {})
-                sentiment_data = next((s for s in sentiment_by_speaker if s['speaker_id'] == speaker_id), {})
-                
-                talk_time = speaker_talk_time.get(speaker_id, 0)
-                participation = (talk_time / total_talk_time * 100) if total_talk_time > 0 else 0
-                
-                speaker_analysis[speaker_id] = SpeakerAnalysis(
-                    speaker_id=speaker_id,
-                    talk_time=round(talk_time, 2),
-                    participation_percentage=round(participation, 2),
-                    transcript=trans_data.get('full_transcript', ''),
-                    word_count=trans_data.get('total_words', 0),
-                    filler_count=filler_data.get('total_fillers', 0),
-                    filler_ratio=filler_data.get('filler_ratio', 0),
-                    filler_breakdown=filler_data.get('filler_counts', {}),
-                    total_silence_duration=silence_data.get('total_silence_duration', 0),
-                    silence_percentage=silence_data.get('silence_percentage', 0),
-                    pause_count=silence_data.get('pause_count', 0),
-                    average_pause_duration=silence_data.get('average_pause_duration', 0),
-                    sentiment_polarity=sentiment_data.get('polarity', 0),
-                    sentiment_label=sentiment_data.get('sentiment_label', 'unknown'),
-                    engagement_from_sentiment=sentiment_data.get('engagement_from_sentiment', 0),
-                    dominant_emotion=sentiment_data.get('emotions', {}).get('dominant', 'neutral'),
-                    turn_count=0
-                )
-        
-        # Calculate turn counts
-        for i in range(len(segments)):
-            speaker_id = segments[i].speaker_id
-            if speaker_id in speaker_analysis:
-                speaker_analysis[speaker_id].turn_count += 1
+            speaker_analysis[speaker_id] = SpeakerAnalysis(
+                speaker_id=speaker_id,
+                talk_time=round(speaker_talk_time.get(speaker_id, 0), 2),
+                participation_percentage=speaker_participation.get(speaker_id, 0),
+                transcript=trans_data.get('full_transcript', ''),
+                word_count=trans_data.get('total_words', 0),
+                filler_count=filler_data.get('total_fillers', 0),
+                filler_ratio=filler_data.get('filler_ratio', 0),
+                filler_breakdown=filler_data.get('filler_counts', {}),
+                total_silence_duration=silence_data.get('total_silence_duration', 0),
+                silence_percentage=silence_data.get('silence_percentage', 0),
+                pause_count=silence_data.get('pause_count', 0),
+                average_pause_duration=silence_data.get('average_pause_duration', 0),
+                sentiment_polarity=sentiment_data.get('polarity', 0),
+                sentiment_label=sentiment_data.get('sentiment_label', 'unknown'),
+                engagement_from_sentiment=sentiment_data.get('engagement_from_sentiment', 0),
+                dominant_emotion=sentiment_data.get('emotions', {}).get('dominant', 'neutral'),
+                turn_count=turn_count_per_speaker.get(speaker_id, 0)
+            )
         
         # Generate insights and recommendations
         insights = []
@@ -407,7 +597,7 @@ class DiarizationService:
         meeting_id: str,
         source_type: SourceType,
         segments: List[SpeakerSegment],
-        metrics: Dict,
+        metrics: EngagementMetrics,
         comprehensive_analysis: Dict,
         audio_file_name: str,
         duration: float
@@ -439,15 +629,52 @@ class DiarizationService:
             audio_file_name=audio_file_name
         )
         
-        result = self.meetings_collection.insert_one(analysis.model_dump())
-        return str(result.inserted_id)
+        # Store segments as parallel arrays: smaller BSON and faster decode
+        document = MeetingAnalysisAdapter.dump_python(analysis, mode="python", exclude_none=True)
+        document["segments"] = SegmentArrays.from_segments(analysis.segments).model_dump()
+        
+        # Upsert on meeting_id so a retried task replaces its earlier result;
+        # the document id comes back in the same round trip
+        result = self.meetings_collection.find_one_and_update(
+            {"meeting_id": meeting_id},
+            {"$set": document},
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        analysis_id = result["_id"]
+        
+        # Drop any cached API response so readers see the fresh analysis
+        try:
+            self.redis_client.delete(analysis_cache_key(meeting_id))
+        except RedisError as e:
+            logger.warning("Could not invalidate cached analysis %s: %s", meeting_id, e)
+        
+        return str(analysis_id)
     
     def close_connection(self):
-        """Close MongoDB connection"""
+        """Close MongoDB and Redis connections"""
         self.mongodb_client.close()
+        self.redis_client.close()
 
 
-@celery_app.task(bind=True, name="app.tasks.diarization.analyze_audio_task")
+def get_diarization_service() -> DiarizationService:
+    """
+    Return the worker's shared DiarizationService
+    Preloaded by the worker_process_init signal; built on first use otherwise
+    """
+    if celery_app.services is None:
+        celery_app.services = SimpleNamespace(diarizer=DiarizationService())
+    return celery_app.services.diarizer
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.diarization.analyze_audio_task",
+    autoretry_for=(ConnectionFailure, RedisConnectionError),
+    retry_backoff=True,
+    max_retries=3
+)
 def analyze_audio_task(
     self,
     file_path: str,
@@ -457,24 +684,39 @@ def analyze_audio_task(
 ):
     """
     Celery task to perform comprehensive analysis
+    Reuses the worker's warm models instead of loading them per task
     """
-    service = DiarizationService()
+    service = get_diarization_service()
     
     try:
+        # Extract audio from video uploads before analysis
+        # (a retried task finds the audio already extracted)
+        if os.path.splitext(file_path)[1].lower() in VIDEO_EXTENSIONS:
+            extracted_path = os.path.splitext(file_path)[0] + ".wav"
+            if os.path.exists(extracted_path) and not os.path.exists(file_path):
+                file_path = extracted_path
+            else:
+                file_path = extract_audio_from_video(file_path)
+        
         # Get audio duration
         y, sr = service.load_audio(file_path)
-        duration = librosa.get_duration(y=y, sr=sr)
+        duration = len(y) / sr
         
-        # Perform diarization
-        segments = service.perform_diarization(file_path)
+        # Whisper does not depend on the speaker turns, so transcription runs on a
+        # second thread while pyannote diarizes (both release the GIL in torch)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            logger.info("Performing speech-to-text transcription...")
+            transcript_future = executor.submit(service.stt_service.transcribe_audio, y)
+            segments = service.perform_diarization(y, sr)
+            transcript_result = transcript_future.result()
         
         # Calculate basic metrics
         metrics = service.calculate_engagement_metrics(segments, duration)
         
         # Perform comprehensive analysis
-        print("Starting comprehensive analysis...")
+        logger.info("Starting comprehensive analysis...")
         comprehensive_analysis = service.perform_comprehensive_analysis(
-            y, sr, segments, file_path, duration
+            y, sr, segments, duration, transcript_result=transcript_result
         )
         
         # Save to database
@@ -492,16 +734,13 @@ def analyze_audio_task(
         if os.path.exists(file_path):
             os.remove(file_path)
         
-        service.close_connection()
-        
         return {
             "status": "success",
             "analysis_id": analysis_id,
             "meeting_id": meeting_id,
-            "metrics": metrics
+            "metrics": metrics.as_dict()
         }
     
-    except Exception as e:
-        service.close_connection()
-        print(f"Error in analysis: {str(e)}")
-        raise Exception(f"Audio analysis failed: {str(e)}")
+    except Exception:
+        logger.exception("Error in analysis")
+        raise
@@ -3,11 +3,58 @@ Filler Word Detection Module
 Detects and analyzes filler words like 'um', 'uh', 'aah', 'mmm', 'ooo', 'eh', 'like', 'you know', etc.
 """
 
-import librosa
+import logging
+
+import numba
 import numpy as np
 from typing import List, Dict, Tuple
 import re
-from scipy import signal
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+@numba.njit(
+    "Tuple((int64[:], int64[:]))(float32[:], int64, int64, int64, float64, float64)",
+    cache=True,
+    fastmath=True,
+)
+def _filler_runs_kernel(y, sr, frame_length, hop_length, threshold_factor, max_duration):
+    """
+    Fused filler scan over one segment: centered short-time RMS, threshold at
+    a fraction of its mean, then the first/last frame of each short speech run.
+    A run still open at the end of the segment is not counted
+    """
+    n = y.size
+    half = frame_length // 2
+    n_frames = 1 + n // hop_length
+    rms = np.empty(n_frames)
+    for i in range(n_frames):
+        # Frame i covers samples [i*hop - half, i*hop + half) of the zero-padded signal
+        lo = max(i * hop_length - half, 0)
+        hi = min(i * hop_length + half, n)
+        acc = 0.0
+        for j in range(lo, hi):
+            acc += y[j] * y[j]
+        rms[i] = np.sqrt(acc / frame_length)
+    threshold = rms.mean() * threshold_factor
+
+    max_runs = n_frames // 2 + 1
+    run_first = np.empty(max_runs, np.int64)
+    run_last = np.empty(max_runs, np.int64)
+    count = 0
+    first = -1
+    for i in range(n_frames):
+        if rms[i] > threshold:
+            if first < 0:
+                first = i
+        elif first >= 0:
+            if (i - 1 - first) * hop_length / sr < max_duration:
+                run_first[count] = first
+                run_last[count] = i - 1
+                count += 1
+            first = -1
+    return run_first[:count], run_last[:count]
 
 
 class FillerWordDetector:
@@ -32,9 +79,9 @@ class FillerWordDetector:
         'yeah': r'\byeah\b|\byeaah\b',
     }
     
-    def __init__(self):
-        self.filler_word_timestamps = []
-        
+    # All patterns in one regex, one named group per filler, matched against lowercased text
+    FILLER_RE = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in FILLER_PATTERNS.items()))
+    
     def detect_fillers_from_transcript(
         self, 
         transcript: str, 
@@ -52,13 +99,9 @@ class FillerWordDetector:
         Returns:
             Dictionary with filler word counts and details
         """
-        text_lower = transcript.lower()
-        filler_counts = {}
-        
-        for filler_name, pattern in self.FILLER_PATTERNS.items():
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            if matches:
-                filler_counts[filler_name] = len(matches)
+        # Single scan of the text; matches are bucketed by the group that fired
+        matches = Counter(m.lastgroup for m in self.FILLER_RE.finditer(transcript.lower()))
+        filler_counts = {name: matches[name] for name in self.FILLER_PATTERNS if matches[name]}
         
         total_fillers = sum(filler_counts.values())
         word_count = len(transcript.split())
@@ -73,6 +116,19 @@ class FillerWordDetector:
             'timestamp': start_time
         }
     
+    def detect_fillers_batch(self, transcripts: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Detect filler words for several speakers
+        
+        Args:
+            transcripts: (transcript, speaker_id) pairs
+            
+        Returns:
+            One filler analysis per pair, in input order
+        """
+        # Regex scanning holds the GIL, so threads would add overhead without parallelism
+        return [self.detect_fillers_from_transcript(*pair) for pair in transcripts]
+    
     def detect_fillers_from_audio(
         self,
         y: np.ndarray,
@@ -97,7 +153,8 @@ class FillerWordDetector:
             # Extract segment
             start_sample = int(segment_start * sr)
             end_sample = int(segment_end * sr)
-            segment = y[start_sample:end_sample]
+            # float32 once up front: halves the bytes the RMS pass reads when y is float64
+            segment = np.ascontiguousarray(y[start_sample:end_sample], dtype=np.float32)
             
             if len(segment) == 0:
                 return {
@@ -106,42 +163,21 @@ class FillerWordDetector:
                     'confidence': 0.0
                 }
             
-            # Compute MFCC (Mel-Frequency Cepstral Coefficients) for speech characteristics
-            mfcc = librosa.feature.mfcc(y=segment, sr=sr, n_mfcc=13)
-            
-            # Detect speech activity
-            S = librosa.feature.melspectrogram(y=segment, sr=sr)
-            S_db = librosa.power_to_db(S, ref=np.max)
-            
-            # Energy-based activity detection
-            energy = np.sqrt(np.mean(S ** 2, axis=0))
-            threshold = np.mean(energy) * 0.5
-            
-            # Find speech segments
-            speech_frames = energy > threshold
+            # Energy-based activity detection on the short-time RMS envelope.
+            # Fillers are speech runs that are typically very short (<1 second)
+            run_first, run_last = _filler_runs_kernel(segment, sr, 2048, 512, 0.5, 1.0)
             
             # Convert frames to time
-            times = librosa.frames_to_time(np.arange(len(speech_frames)), sr=sr)
-            
-            # Group consecutive speech frames
-            filler_segments = []
-            current_segment_start = None
-            
-            for i, is_speech in enumerate(speech_frames):
-                if is_speech:
-                    if current_segment_start is None:
-                        current_segment_start = times[i]
-                else:
-                    if current_segment_start is not None:
-                        segment_duration = times[i-1] - current_segment_start
-                        # Fillers typically very short (<1 second) or have specific characteristics
-                        if segment_duration < 1.0:  # Likely filler
-                            filler_segments.append({
-                                'start': current_segment_start + segment_start,
-                                'end': times[i-1] + segment_start,
-                                'duration': segment_duration
-                            })
-                        current_segment_start = None
+            starts = run_first * 512 / sr
+            ends = run_last * 512 / sr
+            filler_segments = [
+                {
+                    'start': start + segment_start,
+                    'end': end + segment_start,
+                    'duration': end - start
+                }
+                for start, end in zip(starts.tolist(), ends.tolist())
+            ]
             
             probable_filler_count = len(filler_segments)
             confidence = min(0.8, probable_filler_count * 0.1)  # Heuristic confidence
@@ -151,8 +187,8 @@ class FillerWordDetector:
                 'filler_segments': filler_segments,
                 'confidence': round(confidence, 2)
             }
-        except Exception as e:
-            print(f"Error in audio filler detection: {str(e)}")
+        except Exception:
+            logger.exception("Error in audio filler detection")
             return {
                 'probable_fillers': 0,
                 'filler_segments': [],
@@ -177,7 +213,14 @@ class FillerWordDetector:
                 'most_common_fillers': {}
             }
         
-        total_fillers = sum(f.get('total_fillers', 0) for f in fillers_by_speaker)
+        # Totals and the merged filler counts in one pass
+        total_fillers = 0
+        ratio_sum = 0.0
+        all_fillers = Counter()
+        for filler_data in fillers_by_speaker:
+            total_fillers += filler_data.get('total_fillers', 0)
+            ratio_sum += filler_data.get('filler_ratio', 0)
+            all_fillers.update(filler_data.get('filler_counts', {}))
         
         # Rank speakers by filler usage
         filler_ranking = sorted(
@@ -187,23 +230,9 @@ class FillerWordDetector:
         )
         
         # Get most common filler words overall
-        all_fillers = {}
-        for filler_data in fillers_by_speaker:
-            for filler_name, count in filler_data.get('filler_counts', {}).items():
-                all_fillers[filler_name] = all_fillers.get(filler_name, 0) + count
+        most_common_fillers = dict(all_fillers.most_common(5))  # Top 5
         
-        sorted_fillers = sorted(
-            all_fillers.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )
-        
-        most_common_fillers = dict(sorted_fillers[:5])  # Top 5
-        
-        avg_filler_ratio = (
-            sum(f.get('filler_ratio', 0) for f in fillers_by_speaker) / len(fillers_by_speaker)
-            if fillers_by_speaker else 0
-        )
+        avg_filler_ratio = ratio_sum / len(fillers_by_speaker)
         
         return {
             'total_fillers': total_fillers,
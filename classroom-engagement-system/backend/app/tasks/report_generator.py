@@ -3,15 +3,47 @@ Analysis Report Generator
 Generates comprehensive, formatted analysis reports for meeting assessments
 """
 
-from typing import Dict, List
+from typing import Dict, Iterator, List
 from datetime import datetime
 
 
+# Per-speaker blocks of the speaker report, filled with str.format_map
+_SPEAKER_METRICS_TEMPLATE = """
+┌─ {speaker_id} ─────────────────────────────────────────────┐
+│
+│  📝 SPEAKING METRICS:
+│    • Talk Time: {talk_time}
+│    • Participation: {participation_percentage:.1f}%
+│    • Words Spoken: {word_count}
+│    • Turn Count: {turn_count}
+│
+│  ❌ FILLER WORDS:
+│    • Total Fillers: {filler_count}
+│    • Filler Ratio: {filler_ratio:.2f}%
+"""
+
+_SPEAKER_PAUSES_TEMPLATE = """│
+│  ⏸️  SILENCE & PAUSES:
+│    • Total Silence: {total_silence}
+│    • Silence %%: {silence_percentage:.1f}%
+│    • Pause Count: {pause_count}
+│    • Avg Pause: {average_pause_duration:.2f}s
+│
+│  😊 SENTIMENT & TONE:
+│    • Sentiment: {sentiment_label}
+│    • Polarity: {sentiment_polarity:.2f}
+│    • Engagement Score: {engagement_from_sentiment:.1f}/100
+│    • Dominant Emotion: {dominant_emotion}
+│
+"""
+
+
 class AnalysisReportGenerator:
     """Generates comprehensive analysis reports"""
     
     def __init__(self):
         self.timestamp = datetime.now()
+        self._timestamp_str = self.timestamp.strftime('%Y-%m-%d %H:%M:%S')
     
     def generate_overall_summary(self, analysis: Dict) -> str:
         """
@@ -35,7 +67,7 @@ class AnalysisReportGenerator:
 
 Meeting ID: {meeting_id}
 Duration: {self._format_time(duration)}
-Analysis Date: {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
+Analysis Date: {self._timestamp_str}
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -58,57 +90,50 @@ Analysis Date: {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
         Returns:
             Formatted speaker report
         """
-        report = """
+        parts = ["""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 👥 SPEAKER ANALYSIS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-"""
+"""]
         for speaker_id, analysis in speaker_analysis.items():
-            report += f"""
-┌─ {speaker_id} ─────────────────────────────────────────────┐
-│
-│  📝 SPEAKING METRICS:
-│    • Talk Time: {self._format_time(analysis.talk_time)}
-│    • Participation: {analysis.participation_percentage:.1f}%
-│    • Words Spoken: {analysis.word_count}
-│    • Turn Count: {analysis.turn_count}
-│
-│  ❌ FILLER WORDS:
-│    • Total Fillers: {analysis.filler_count}
-│    • Filler Ratio: {analysis.filler_ratio:.2f}%
-"""
+            # Template fields for this speaker; times are pre-formatted, numbers keep their format specs
+            fields = {
+                'speaker_id': speaker_id,
+                'talk_time': self._format_time(analysis.talk_time),
+                'participation_percentage': analysis.participation_percentage,
+                'word_count': analysis.word_count,
+                'turn_count': analysis.turn_count,
+                'filler_count': analysis.filler_count,
+                'filler_ratio': analysis.filler_ratio,
+                'total_silence': self._format_time(analysis.total_silence_duration),
+                'silence_percentage': analysis.silence_percentage,
+                'pause_count': analysis.pause_count,
+                'average_pause_duration': analysis.average_pause_duration,
+                'sentiment_label': analysis.sentiment_label.upper(),
+                'sentiment_polarity': analysis.sentiment_polarity,
+                'engagement_from_sentiment': analysis.engagement_from_sentiment,
+                'dominant_emotion': analysis.dominant_emotion,
+            }
+            parts.append(_SPEAKER_METRICS_TEMPLATE.format_map(fields))
             
             if analysis.filler_breakdown:
-                report += "│    • Breakdown: "
+                parts.append("│    • Breakdown: ")
                 fillers = [f"{word}({count})" for word, count in list(analysis.filler_breakdown.items())[:3]]
-                report += ", ".join(fillers) + "\n"
+                parts.append(", ".join(fillers) + "\n")
             
-            report += f"""│
-│  ⏸️  SILENCE & PAUSES:
-│    • Total Silence: {self._format_time(analysis.total_silence_duration)}
-│    • Silence %%: {analysis.silence_percentage:.1f}%
-│    • Pause Count: {analysis.pause_count}
-│    • Avg Pause: {analysis.average_pause_duration:.2f}s
-│
-│  😊 SENTIMENT & TONE:
-│    • Sentiment: {analysis.sentiment_label.upper()}
-│    • Polarity: {analysis.sentiment_polarity:.2f}
-│    • Engagement Score: {analysis.engagement_from_sentiment:.1f}/100
-│    • Dominant Emotion: {analysis.dominant_emotion}
-│
-"""
+            parts.append(_SPEAKER_PAUSES_TEMPLATE.format_map(fields))
             
             if analysis.transcript:
                 preview = analysis.transcript[:80] + "..." if len(analysis.transcript) > 80 else analysis.transcript
-                report += f"""│  📄 TRANSCRIPT PREVIEW:
+                parts.append(f"""│  📄 TRANSCRIPT PREVIEW:
 │    "{preview}"
 │
-"""
+""")
             
-            report += "└────────────────────────────────────────────────────┘\n"
+            parts.append("└────────────────────────────────────────────────────┘\n")
         
-        return report
+        return ''.join(parts)
     
     def generate_filler_analysis(self, filler_summary: Dict) -> str:
         """
@@ -120,36 +145,36 @@ Analysis Date: {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}
         Returns:
             Formatted filler report
         """
-        report = """
+        parts = ["""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 ❌ FILLER WORD ANALYSIS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-"""
+"""]
         total = filler_summary.get('total_fillers', 0)
         avg_ratio = filler_summary.get('average_filler_ratio', 0)
         
-        report += f"""
+        parts.append(f"""
 Total Fillers Used: {total}
 Average Filler Ratio: {avg_ratio:.2f}%
 
-"""
+""")
         
         if filler_summary.get('most_common_fillers'):
-            report += "Most Common Fillers:\n"
+            parts.append("Most Common Fillers:\n")
             for filler, count in filler_summary['most_common_fillers'].items():
                 bar_length = min(30, count)
                 bar = "█" * bar_length
-                report += f"  • {filler:15} {count:3} times  {bar}\n"
-            report += "\n"
+                parts.append(f"  • {filler:15} {count:3} times  {bar}\n")
+            parts.append("\n")
         
         if filler_summary.get('filler_ranking'):
-            report += "Speaker Ranking (Most Fillers):\n"
+            parts.append("Speaker Ranking (Most Fillers):\n")
             for rank, data in enumerate(filler_summary['filler_ranking'], 1):
-                report += f"  {rank}. {data['speaker_id']:15} - {data['total_fillers']} fillers ({data['filler_ratio']:.1f}%)\n"
+                parts.append(f"  {rank}. {data['speaker_id']:15} - {data['total_fillers']} fillers ({data['filler_ratio']:.1f}%)\n")
         
-        report += "\n"
-        return report
+        parts.append("\n")
+        return ''.join(parts)
     
     def generate_silence_analysis(self, pause_summary: Dict) -> str:
         """
@@ -161,35 +186,35 @@ Average Filler Ratio: {avg_ratio:.2f}%
         Returns:
             Formatted silence report
         """
-        report = """
+        parts = ["""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 ⏸️  SILENCE & PAUSE ANALYSIS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-"""
-        report += f"""
+"""]
+        parts.append(f"""
 Total Silence Time: {self._format_time(pause_summary.get('total_silence_time', 0))}
 Average Pause Count: {pause_summary.get('average_pause_count', 0):.1f}
 
-"""
+""")
         
         if pause_summary.get('speaker_pause_ranking'):
-            report += "Speaker Pause Statistics:\n"
+            parts.append("Speaker Pause Statistics:\n")
             for data in pause_summary['speaker_pause_ranking']:
-                report += f"""
+                parts.append(f"""
   {data['speaker_id']}:
     • Pause Count: {data['pause_count']}
     • Avg Pause: {data['avg_pause_duration']:.2f}s
     • Total Silence: {self._format_time(data['total_silence'])}
-"""
+""")
         
         if pause_summary.get('insights'):
-            report += "\nKey Insights:\n"
+            parts.append("\nKey Insights:\n")
             for insight in pause_summary['insights']:
-                report += f"  • {insight}\n"
+                parts.append(f"  • {insight}\n")
         
-        report += "\n"
-        return report
+        parts.append("\n")
+        return ''.join(parts)
     
     def generate_sentiment_analysis(self, sentiment_summary: Dict) -> str:
         """
@@ -201,43 +226,43 @@ Average Pause Count: {pause_summary.get('average_pause_count', 0):.1f}
         Returns:
             Formatted sentiment report
         """
-        report = """
+        parts = ["""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 😊 SENTIMENT & TONE ANALYSIS:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-"""
+"""]
         sentiment = sentiment_summary.get('overall_sentiment', 'neutral')
         polarity = sentiment_summary.get('average_polarity', 0)
         tone = sentiment_summary.get('emotional_tone', 'calm')
         
-        report += f"""
+        parts.append(f"""
 Overall Sentiment: {sentiment.upper()}
 Average Polarity: {polarity:.2f} (-1 neutral to +1 positive)
 Emotional Tone: {tone}
 
-"""
+""")
         
         if sentiment_summary.get('sentiment_distribution'):
-            report += "Sentiment Distribution:\n"
+            parts.append("Sentiment Distribution:\n")
             dist = sentiment_summary['sentiment_distribution']
             for sentiment_type, count in dist.items():
-                report += f"  • {sentiment_type.upper()}: {count}\n"
-            report += "\n"
+                parts.append(f"  • {sentiment_type.upper()}: {count}\n")
+            parts.append("\n")
         
         if sentiment_summary.get('engagement_ranking'):
-            report += "Engagement Ranking (by sentiment):\n"
+            parts.append("Engagement Ranking (by sentiment):\n")
             for rank, data in enumerate(sentiment_summary['engagement_ranking'], 1):
                 emoji = "🟢" if data['engagement_score'] > 70 else "🟡" if data['engagement_score'] > 40 else "🔴"
-                report += f"  {rank}. {data['speaker_id']:15} - {data['engagement_score']:.1f}/100 {emoji}\n"
+                parts.append(f"  {rank}. {data['speaker_id']:15} - {data['engagement_score']:.1f}/100 {emoji}\n")
         
         if sentiment_summary.get('insights'):
-            report += "\nKey Insights:\n"
+            parts.append("\nKey Insights:\n")
             for insight in sentiment_summary['insights']:
-                report += f"  • {insight}\n"
+                parts.append(f"  • {insight}\n")
         
-        report += "\n"
-        return report
+        parts.append("\n")
+        return ''.join(parts)
     
     def generate_recommendations(self, recommendations: List[str]) -> str:
         """
@@ -249,55 +274,65 @@ Emotional Tone: {tone}
         Returns:
             Formatted recommendations
         """
-        report = """
+        parts = ["""
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 💡 RECOMMENDATIONS FOR IMPROVEMENT:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
-"""
+"""]
         if not recommendations:
-            report += "No specific recommendations at this time.\n\n"
+            parts.append("No specific recommendations at this time.\n\n")
         else:
             for idx, rec in enumerate(recommendations, 1):
-                report += f"  {idx}. {rec}\n"
-            report += "\n"
+                parts.append(f"  {idx}. {rec}\n")
+            parts.append("\n")
         
-        return report
+        return ''.join(parts)
     
-    def generate_full_report(self, analysis: Dict) -> str:
+    def iter_full_report(self, analysis: Dict) -> Iterator[str]:
         """
-        Generate the complete analysis report
+        Generate the complete analysis report one section at a time
         
         Args:
             analysis: The MeetingAnalysis data
             
-        Returns:
-            Complete formatted report
+        Yields:
+            Formatted report sections, in order
         """
-        full_report = self.generate_overall_summary(analysis)
-        full_report += self.generate_speaker_report(analysis.get('speaker_analysis', {}))
-        full_report += self.generate_filler_analysis({
+        yield self.generate_overall_summary(analysis)
+        yield self.generate_speaker_report(analysis.get('speaker_analysis', {}))
+        yield self.generate_filler_analysis({
             'total_fillers': analysis.get('total_filler_count', 0),
             'average_filler_ratio': analysis.get('average_filler_ratio', 0),
             'most_common_fillers': analysis.get('most_common_fillers', {}),
             'filler_ranking': []
         })
-        full_report += self.generate_silence_analysis(analysis.get('pause_statistics', {}))
-        full_report += self.generate_sentiment_analysis({
+        yield self.generate_silence_analysis(analysis.get('pause_statistics', {}))
+        yield self.generate_sentiment_analysis({
             'overall_sentiment': analysis.get('overall_sentiment', 'neutral'),
             'average_polarity': analysis.get('average_polarity', 0),
             'emotional_tone': analysis.get('emotional_tone', 'calm'),
             'sentiment_distribution': {},
             'engagement_ranking': []
         })
-        full_report += self.generate_recommendations(analysis.get('recommendations', []))
-        full_report += """
+        yield self.generate_recommendations(analysis.get('recommendations', []))
+        yield """
 ╔════════════════════════════════════════════════════════════════╗
 ║                    END OF REPORT                               ║
 ╚════════════════════════════════════════════════════════════════╝
 """
+    
+    def generate_full_report(self, analysis: Dict) -> str:
+        """
+        Generate the complete analysis report
         
-        return full_report
+        Args:
+            analysis: The MeetingAnalysis data
+            
+        Returns:
+            Complete formatted report
+        """
+        return ''.join(self.iter_full_report(analysis))
     
     @staticmethod
     def _format_time(seconds: float) -> str:
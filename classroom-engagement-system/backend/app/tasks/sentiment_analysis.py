@@ -3,51 +3,94 @@ Sentiment and Tone Analysis Module
 Analyzes sentiment, tone, and engagement indicators in transcripts
 """
 
-from typing import List, Dict
+import logging
+from collections import Counter
+from functools import cached_property
+from typing import List, Dict, Tuple
 import re
-from textblob import TextBlob
-from transformers import pipeline
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import numpy as np
 
+logger = logging.getLogger(__name__)
+
+
+# Define emotion-indicating words
+POSITIVE_INDICATORS = {
+    'great': 2, 'excellent': 2, 'amazing': 2, 'wonderful': 2, 'fantastic': 2,
+    'love': 1.5, 'good': 1, 'nice': 1, 'happy': 1.5, 'glad': 1.5,
+    'brilliant': 2, 'awesome': 2, 'perfect': 1.5,
+    'interesting': 0.5, 'cool': 1, 'fun': 1, 'enjoy': 1.5
+}
+
+NEGATIVE_INDICATORS = {
+    'terrible': -2, 'awful': -2, 'horrible': -2, 'hate': -2, 'bad': -1,
+    'poor': -1, 'wrong': -1, 'sad': -1.5, 'angry': -1.5, 'frustrated': -1.5,
+    'difficult': -0.5, 'hard': -0.5, 'problem': -0.5, 'issue': -0.5, 'concerned': -0.5
+}
+
+# Engagement indicators
+ENGAGEMENT_INDICATORS = {
+    'agree': 1, 'absolutely': 1, 'definitely': 1, 'exactly': 1, 'right': 0.5,
+    'understand': 0.5, 'know': 0.5, 'think': 0.5, 'believe': 0.5, 'feel': 0.5
+}
+
+DISENGAGEMENT_INDICATORS = {
+    'whatever': -1, 'dunno': -0.5, 'maybe': -0.5, 'probably': -0.5, 'guess': -0.5,
+    'not sure': -0.5, 'confused': -1, 'lost': -1
+}
+
+# Engagement and disengagement markers share one table (disengagement weights negative)
+_ENGAGEMENT_WEIGHTS = {
+    **ENGAGEMENT_INDICATORS,
+    **{word: -abs(weight) for word, weight in DISENGAGEMENT_INDICATORS.items()}
+}
+
+_WORD_RE = re.compile(r'\w+')
+
+# First words of the multi-word indicators ('not sure'); only these start a bigram
+_PHRASE_HEADS = frozenset(
+    phrase.split()[0]
+    for table in (POSITIVE_INDICATORS, NEGATIVE_INDICATORS, _ENGAGEMENT_WEIGHTS)
+    for phrase in table if ' ' in phrase
+)
+
+
+def _indicator_words(text_lower: str) -> frozenset:
+    """
+    Words of a lowercased text as a set, plus the two-word phrases that can be
+    indicators, so each indicator table is scored by set membership
+    """
+    tokens = _WORD_RE.findall(text_lower)
+    words = set(tokens)
+    if words & _PHRASE_HEADS:
+        words.update(
+            f'{first} {second}' for first, second in zip(tokens, tokens[1:]) if first in _PHRASE_HEADS
+        )
+    return frozenset(words)
+
 
 class SentimentToneAnalyzer:
     """Analyzes sentiment and tone of speech"""
     
-    # Define emotion-indicating words
-    POSITIVE_INDICATORS = {
-        'great': 2, 'excellent': 2, 'amazing': 2, 'wonderful': 2, 'fantastic': 2,
-        'love': 1.5, 'good': 1, 'nice': 1, 'happy': 1.5, 'glad': 1.5,
-        'brilliant': 2, 'awesome': 2, 'perfect': 1.5, 'brilliant': 2,
-        'interesting': 0.5, 'cool': 1, 'fun': 1, 'enjoy': 1.5
-    }
+    @cached_property
+    def vader(self) -> SentimentIntensityAnalyzer:
+        """Lexicon-based polarity scorer, built once per analyzer"""
+        return SentimentIntensityAnalyzer()
     
-    NEGATIVE_INDICATORS = {
-        'terrible': -2, 'awful': -2, 'horrible': -2, 'hate': -2, 'bad': -1,
-        'poor': -1, 'wrong': -1, 'sad': -1.5, 'angry': -1.5, 'frustrated': -1.5,
-        'difficult': -0.5, 'hard': -0.5, 'problem': -0.5, 'issue': -0.5, 'concerned': -0.5
-    }
-    
-    # Engagement indicators
-    ENGAGEMENT_INDICATORS = {
-        'agree': 1, 'absolutely': 1, 'definitely': 1, 'exactly': 1, 'right': 0.5,
-        'understand': 0.5, 'know': 0.5, 'think': 0.5, 'believe': 0.5, 'feel': 0.5
-    }
-    
-    DISENGAGEMENT_INDICATORS = {
-        'whatever': -1, 'dunno': -0.5, 'maybe': -0.5, 'probably': -0.5, 'guess': -0.5,
-        'not sure': -0.5, 'confused': -1, 'lost': -1
-    }
-    
-    def __init__(self):
-        """Initialize sentiment analyzer with transformer models"""
+    @cached_property
+    def zero_shot_classifier(self):
+        """
+        Zero-shot classification model for finer sentiment detection
+        Loaded on first use (bart-large-mnli is ~1.6GB); None if it cannot be loaded
+        """
         try:
-            # Try to load zero-shot classification for better sentiment detection
-            self.zero_shot_classifier = pipeline(
+            from transformers import pipeline
+            return pipeline(
                 "zero-shot-classification",
                 model="facebook/bart-large-mnli"
             )
-        except:
-            self.zero_shot_classifier = None
+        except Exception:
+            return None
     
     def analyze_speaker_sentiment(
         self,
@@ -75,10 +118,10 @@ class SentimentToneAnalyzer:
             }
         
         try:
-            # Use TextBlob for basic sentiment
-            blob = TextBlob(transcript)
-            polarity = blob.sentiment.polarity  # -1 to 1
-            subjectivity = blob.sentiment.subjectivity  # 0 to 1
+            # Use VADER for basic sentiment (a single lexicon pass over the text)
+            scores = self.vader.polarity_scores(transcript)
+            polarity = scores['compound']  # -1 to 1
+            subjectivity = scores['pos'] + scores['neg']  # 0 to 1
             
             # Classify sentiment
             if polarity > 0.1:
@@ -91,11 +134,14 @@ class SentimentToneAnalyzer:
                 sentiment_label = 'neutral'
                 confidence = 0.5
             
+            # Tokenize once for both indicator scores
+            words = _indicator_words(transcript.lower())
+            
             # Detect emotions
-            emotions = self._detect_emotions(transcript)
+            emotions = self._detect_emotions(words)
             
             # Calculate engagement score from sentiment
-            engagement_score = self._calculate_sentiment_engagement(transcript)
+            engagement_score = self._calculate_sentiment_engagement(words)
             
             return {
                 'speaker_id': speaker_id,
@@ -106,8 +152,8 @@ class SentimentToneAnalyzer:
                 'emotions': emotions,
                 'engagement_from_sentiment': round(engagement_score, 2)
             }
-        except Exception as e:
-            print(f"Error in sentiment analysis: {str(e)}")
+        except Exception:
+            logger.exception("Error in sentiment analysis")
             return {
                 'speaker_id': speaker_id,
                 'polarity': 0.0,
@@ -118,30 +164,36 @@ class SentimentToneAnalyzer:
                 'engagement_from_sentiment': 0.0
             }
     
-    def _detect_emotions(self, transcript: str) -> Dict:
+    def analyze_speakers_batch(self, transcripts: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Analyze sentiment for several speakers
+        
+        Args:
+            transcripts: (transcript, speaker_id) pairs
+            
+        Returns:
+            One sentiment analysis per pair, in input order
+        """
+        # VADER is pure Python and holds the GIL, so threads would add overhead without parallelism
+        return [self.analyze_speaker_sentiment(*pair) for pair in transcripts]
+    
+    def _detect_emotions(self, words: frozenset) -> Dict:
         """
         Detect emotional indicators in text
         
         Args:
-            transcript: Text to analyze
+            words: Indicator words of the text to analyze (from _indicator_words)
             
         Returns:
             Dictionary with emotion scores
         """
-        text_lower = transcript.lower()
         emotions = {}
         
-        # Calculate positive indicators
-        positive_score = sum(
-            score for word, score in self.POSITIVE_INDICATORS.items()
-            if word in text_lower
-        )
+        # Calculate positive indicators (each word scores once, however often it occurs)
+        positive_score = sum(POSITIVE_INDICATORS[word] for word in words.intersection(POSITIVE_INDICATORS))
         
         # Calculate negative indicators
-        negative_score = sum(
-            score for word, score in self.NEGATIVE_INDICATORS.items()
-            if word in text_lower
-        )
+        negative_score = sum(NEGATIVE_INDICATORS[word] for word in words.intersection(NEGATIVE_INDICATORS))
         
         # Determine dominant emotion
         if positive_score > abs(negative_score):
@@ -159,29 +211,18 @@ class SentimentToneAnalyzer:
         
         return emotions
     
-    def _calculate_sentiment_engagement(self, transcript: str) -> float:
+    def _calculate_sentiment_engagement(self, words: frozenset) -> float:
         """
         Calculate engagement score based on sentiment markers
         
         Args:
-            transcript: Text to analyze
+            words: Indicator words of the text to analyze (from _indicator_words)
             
         Returns:
             Engagement score 0-100
         """
-        text_lower = transcript.lower()
-        
-        # Count engagement markers
-        engagement_score = sum(
-            score for word, score in self.ENGAGEMENT_INDICATORS.items()
-            if word in text_lower
-        )
-        
-        # Subtract disengagement markers
-        engagement_score -= sum(
-            abs(score) for word, score in self.DISENGAGEMENT_INDICATORS.items()
-            if word in text_lower
-        )
+        # Count engagement markers, less disengagement markers
+        engagement_score = sum(_ENGAGEMENT_WEIGHTS[word] for word in words.intersection(_ENGAGEMENT_WEIGHTS))
         
         # Normalize to 0-100
         engagement_score = max(0, min(100, engagement_score * 10))
@@ -223,10 +264,7 @@ class SentimentToneAnalyzer:
             overall_sentiment = 'neutral'
         
         # Sentiment distribution
-        sentiment_counts = {}
-        for s in speaker_sentiments:
-            label = s.get('sentiment_label', 'unknown')
-            sentiment_counts[label] = sentiment_counts.get(label, 0) + 1
+        sentiment_counts = dict(Counter(s.get('sentiment_label', 'unknown') for s in speaker_sentiments))
         
         # Engagement ranking
         engagement_ranking = sorted(
@@ -236,12 +274,8 @@ class SentimentToneAnalyzer:
         )
         
         # Emotional tone analysis
-        emotions = [s.get('emotions', {}).get('dominant', 'neutral') for s in speaker_sentiments]
-        emotion_counts = {}
-        for emotion in emotions:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-        
-        dominant_emotion = max(emotion_counts, key=emotion_counts.get) if emotion_counts else 'neutral'
+        emotion_counts = Counter(s.get('emotions', {}).get('dominant', 'neutral') for s in speaker_sentiments)
+        dominant_emotion = emotion_counts.most_common(1)[0][0] if emotion_counts else 'neutral'
         emotional_tone = self._classify_emotional_tone(dominant_emotion)
         
         # Generate insights
@@ -3,10 +3,52 @@ Silence Detection Module
 Detects and analyzes silence/pauses in audio recordings
 """
 
+import logging
+
+import numba
 import numpy as np
 import librosa
-from typing import List, Dict
-from scipy import signal
+import soundfile as sf
+from typing import List, Dict, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+# Frames are 2048-sample windows every HOP_LENGTH samples, so frame i starts at
+# i * HOP_LENGTH / sr seconds
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+
+@numba.njit(
+    "Tuple((int64[:], int64[:]))(float32[:], float64, float64, float64)",
+    cache=True,
+)
+def _silence_runs_kernel(power, threshold_ratio, frame_duration, min_duration):
+    """
+    One pass over a segment's frame power: a frame is silent below threshold_ratio
+    times the segment peak, and the first/last frame of each silent run lasting at
+    least min_duration is returned
+    """
+    n = power.size
+    cutoff = power.max() * threshold_ratio
+    run_first = np.empty(n // 2 + 1, np.int64)
+    run_last = np.empty(n // 2 + 1, np.int64)
+    count = 0
+    i = 0
+    while i < n:
+        if power[i] < cutoff:
+            j = i + 1
+            while j < n and power[j] < cutoff:
+                j += 1
+            if (j - i) * frame_duration >= min_duration:
+                run_first[count] = i
+                run_last[count] = j - 1
+                count += 1
+            i = j
+        else:
+            i += 1
+    return run_first[:count], run_last[:count]
 
 
 class SilenceDetector:
@@ -22,10 +64,71 @@ class SilenceDetector:
         """
         self.silence_threshold_db = silence_threshold_db
         self.min_duration = min_duration
+        # The dB threshold as a power ratio to the segment peak, so frames are compared
+        # without taking logs. Levels sit on an 80 dB floor below the peak, so a
+        # threshold at or under -80 dB never marks anything silent
+        self._threshold_ratio = 10.0 ** (silence_threshold_db / 10.0) if silence_threshold_db > -80 else 0.0
     
-    def detect_silence_in_segment(
+    def compute_frame_levels(
         self,
         y: np.ndarray,
+        sr: int
+    ) -> Tuple[float, np.ndarray]:
+        """
+        Compute short-time frame power once over a whole recording
+        Frames are centred (zero-padded) FRAME_LENGTH-sample windows every HOP_LENGTH
+        samples, read through a strided view so no framed copy of the signal is made
+        
+        Args:
+            y: Audio waveform
+            sr: Sample rate
+            
+        Returns:
+            Frame duration in seconds (frame i starts at i times it) and the
+            mean-square frame power (linear, floored at 1e-10 as amplitude_to_db
+            would; not yet referenced to any segment)
+        """
+        padded = np.pad(np.asarray(y, dtype=np.float32), FRAME_LENGTH // 2)
+        frames = np.lib.stride_tricks.sliding_window_view(padded, FRAME_LENGTH)[::HOP_LENGTH]
+        
+        # Mean square per frame, i.e. RMS squared, without materialising frames * frames
+        power = np.einsum('ij,ij->i', frames, frames) / FRAME_LENGTH
+        np.maximum(power, 1e-10, out=power)
+        return HOP_LENGTH / sr, power
+    
+    def detect_silence_from_levels(
+        self,
+        frame_duration: float,
+        levels: np.ndarray,
+        segment_start: float,
+        segment_end: float
+    ) -> Dict:
+        """
+        Detect silence in a segment using frame levels computed for the whole recording
+        
+        Args:
+            frame_duration: Frame duration from compute_frame_levels
+            levels: Frame power from compute_frame_levels
+            segment_start: Segment start time in seconds
+            segment_end: Segment end time in seconds
+            
+        Returns:
+            Dictionary with silence statistics
+        """
+        try:
+            # First frame starting at or after each bound
+            lo = min(max(int(np.ceil(segment_start / frame_duration)), 0), len(levels))
+            hi = min(max(int(np.ceil(segment_end / frame_duration)), lo), len(levels))
+            return self._silence_stats(
+                levels[lo:hi], lo * frame_duration, frame_duration, segment_start, segment_end
+            )
+        except Exception:
+            logger.exception("Error in silence detection")
+            return self._empty_stats()
+    
+    def detect_silence_in_segment(
+        self,
+        y: Union[np.ndarray, str, sf.SoundFile],
         sr: int,
         segment_start: float,
         segment_end: float
@@ -34,8 +137,9 @@ class SilenceDetector:
         Detect silence in a specific audio segment
         
         Args:
-            y: Full audio waveform
-            sr: Sample rate
+            y: Full audio waveform, or an audio file (path or open SoundFile) to
+               read just the segment from
+            sr: Sample rate of the waveform (a file's own rate is used instead)
             segment_start: Segment start time in seconds
             segment_end: Segment end time in seconds
             
@@ -44,102 +148,107 @@ class SilenceDetector:
         """
         try:
             # Extract segment
-            start_sample = int(segment_start * sr)
-            end_sample = int(segment_end * sr)
-            segment = y[start_sample:end_sample]
+            if isinstance(y, np.ndarray):
+                segment = y[int(segment_start * sr):int(segment_end * sr)]
+            else:
+                segment, sr = self._read_segment(y, segment_start, segment_end)
             
             if len(segment) == 0:
-                return {
-                    'total_silence_duration': 0.0,
-                    'silence_percentage': 0.0,
-                    'pause_count': 0,
-                    'average_pause_duration': 0.0,
-                    'longest_pause': 0.0,
-                    'silence_segments': []
-                }
-            
-            segment_duration = segment_end - segment_start
-            
-            # Compute RMS energy
-            S = librosa.feature.melspectrogram(y=segment, sr=sr)
-            S_db = librosa.power_to_db(S, ref=np.max)
-            
-            # Frame-level energy
-            energy = np.mean(S_db, axis=0)
-            
-            # Detect silence frames
-            silence_frames = energy < self.silence_threshold_db
-            
-            # Convert frames to time
-            frame_times = librosa.frames_to_time(np.arange(len(silence_frames)), sr=sr)
-            frame_duration = frame_times[1] - frame_times[0] if len(frame_times) > 1 else 0.02
-            
-            # Find silence segments
-            silence_segments = []
-            current_silence_start = None
-            total_silence = 0.0
-            
-            for i, is_silent in enumerate(silence_frames):
-                if is_silent:
-                    if current_silence_start is None:
-                        current_silence_start = frame_times[i]
-                else:
-                    if current_silence_start is not None:
-                        silence_duration = frame_times[i-1] - current_silence_start + frame_duration
-                        
-                        # Only count if duration exceeds minimum
-                        if silence_duration >= self.min_duration:
-                            silence_segments.append({
-                                'start': current_silence_start + segment_start,
-                                'end': frame_times[i-1] + segment_start + frame_duration,
-                                'duration': silence_duration
-                            })
-                            total_silence += silence_duration
-                        
-                        current_silence_start = None
-            
-            # Handle silence at end of segment
-            if current_silence_start is not None:
-                silence_duration = frame_times[-1] - current_silence_start + frame_duration
-                if silence_duration >= self.min_duration:
-                    silence_segments.append({
-                        'start': current_silence_start + segment_start,
-                        'end': segment_end,
-                        'duration': silence_duration
-                    })
-                    total_silence += silence_duration
+                return self._empty_stats()
             
-            # Calculate statistics
-            silence_percentage = (total_silence / segment_duration * 100) if segment_duration > 0 else 0
-            pause_count = len(silence_segments)
-            average_pause = (total_silence / pause_count) if pause_count > 0 else 0
-            longest_pause = max([s['duration'] for s in silence_segments]) if silence_segments else 0
-            
-            return {
-                'total_silence_duration': round(total_silence, 2),
-                'silence_percentage': round(silence_percentage, 2),
-                'pause_count': pause_count,
-                'average_pause_duration': round(average_pause, 2),
-                'longest_pause': round(longest_pause, 2),
-                'silence_segments': [
-                    {
-                        'start': round(s['start'], 2),
-                        'end': round(s['end'], 2),
-                        'duration': round(s['duration'], 2)
-                    }
-                    for s in silence_segments
-                ]
-            }
-        except Exception as e:
-            print(f"Error in silence detection: {str(e)}")
-            return {
-                'total_silence_duration': 0.0,
-                'silence_percentage': 0.0,
-                'pause_count': 0,
-                'average_pause_duration': 0.0,
-                'longest_pause': 0.0,
-                'silence_segments': []
-            }
+            frame_duration, levels = self.compute_frame_levels(segment, sr)
+            return self._silence_stats(
+                levels, segment_start, frame_duration, segment_start, segment_end
+            )
+        except Exception:
+            logger.exception("Error in silence detection")
+            return self._empty_stats()
+    
+    @staticmethod
+    def _read_segment(
+        source: Union[str, sf.SoundFile],
+        segment_start: float,
+        segment_end: float
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Read one segment of an audio file as mono float32, seeking past the rest
+        Pass an open SoundFile to reuse one handle across many segments
+        """
+        if not isinstance(source, sf.SoundFile):
+            with sf.SoundFile(source) as f:
+                return SilenceDetector._read_segment(f, segment_start, segment_end)
+        
+        sr = source.samplerate
+        start_sample = int(segment_start * sr)
+        source.seek(start_sample)
+        data = source.read(max(0, int(segment_end * sr) - start_sample), dtype='float32', always_2d=True)
+        return data.mean(axis=1), sr
+    
+    def _silence_stats(
+        self,
+        levels: np.ndarray,
+        first_frame_time: float,
+        frame_duration: float,
+        segment_start: float,
+        segment_end: float
+    ) -> Dict:
+        """
+        Summarise the silent runs among a segment's frames, the first of which
+        starts at first_frame_time (absolute seconds)
+        """
+        if levels.size == 0:
+            return self._empty_stats()
+        
+        segment_duration = segment_end - segment_start
+        
+        # Silent runs long enough to count, with frame power referenced to the
+        # segment's own peak as amplitude_to_db(rms, ref=np.max) would
+        run_first, run_last = _silence_runs_kernel(
+            levels, self._threshold_ratio, frame_duration, self.min_duration
+        )
+        
+        durations = (run_last - run_first + 1) * frame_duration
+        starts = run_first * frame_duration + first_frame_time
+        ends = starts + durations
+        
+        # A run still open at the end of the segment closes at the segment boundary
+        if len(run_last) and run_last[-1] == len(levels) - 1:
+            ends[-1] = segment_end
+        
+        # Calculate statistics
+        total_silence = float(durations.sum())
+        silence_percentage = (total_silence / segment_duration * 100) if segment_duration > 0 else 0
+        pause_count = len(durations)
+        average_pause = (total_silence / pause_count) if pause_count > 0 else 0
+        longest_pause = float(durations.max()) if pause_count else 0
+        
+        return {
+            'total_silence_duration': round(total_silence, 2),
+            'silence_percentage': round(silence_percentage, 2),
+            'pause_count': pause_count,
+            'average_pause_duration': round(average_pause, 2),
+            'longest_pause': round(longest_pause, 2),
+            'silence_segments': [
+                {
+                    'start': round(start, 2),
+                    'end': round(end, 2),
+                    'duration': round(duration, 2)
+                }
+                for start, end, duration in zip(starts.tolist(), ends.tolist(), durations.tolist())
+            ]
+        }
+    
+    @staticmethod
+    def _empty_stats() -> Dict:
+        """Statistics for a segment with no audio"""
+        return {
+            'total_silence_duration': 0.0,
+            'silence_percentage': 0.0,
+            'pause_count': 0,
+            'average_pause_duration': 0.0,
+            'longest_pause': 0.0,
+            'silence_segments': []
+        }
     
     def detect_silence_overall(
         self,
@@ -179,28 +288,34 @@ class SilenceDetector:
                 'insights': []
             }
         
-        # Calculate aggregates
-        total_silence = sum(s.get('total_silence_duration', 0) for s in speaker_silences)
-        avg_pause_count = np.mean([s.get('pause_count', 0) for s in speaker_silences])
-        
-        # Rank speakers by pause frequency (more pauses = less silence = more engagement)
-        pause_ranking = sorted(
-            speaker_silences,
-            key=lambda x: x.get('pause_count', 0),
-            reverse=True
-        )
-        
-        # Find quietest speaker (most total silence)
-        quietest = max(speaker_silences, key=lambda x: x.get('total_silence_duration', 0))
-        most_conversational = min(speaker_silences, key=lambda x: x.get('total_silence_duration', 0))
-        
-        # Generate insights
+        # One pass: aggregates, per-speaker ranking rows, quietest (most total silence)
+        # and most conversational speakers, and insights
+        total_silence = 0
+        pause_counts = []
+        ranking = []
+        quietest_id = most_conversational_id = None
+        quietest_silence = most_conversational_silence = None
         insights = []
         for silence_data in speaker_silences:
             speaker_id = silence_data.get('speaker_id', 'Unknown')
+            pause_count = silence_data.get('pause_count', 0)
+            speaker_silence = silence_data.get('total_silence_duration', 0)
             silence_pct = silence_data.get('silence_percentage', 0)
             avg_pause = silence_data.get('average_pause_duration', 0)
             
+            total_silence += speaker_silence
+            pause_counts.append(pause_count)
+            ranking.append({
+                'speaker_id': speaker_id,
+                'pause_count': pause_count,
+                'avg_pause_duration': avg_pause,
+                'total_silence': speaker_silence
+            })
+            if quietest_silence is None or speaker_silence > quietest_silence:
+                quietest_id, quietest_silence = speaker_id, speaker_silence
+            if most_conversational_silence is None or speaker_silence < most_conversational_silence:
+                most_conversational_id, most_conversational_silence = speaker_id, speaker_silence
+            
             if silence_pct > 40:
                 insights.append(f"{speaker_id}: Very high silence ({silence_pct}%) - may indicate low engagement")
             elif silence_pct > 25:
@@ -208,19 +323,14 @@ class SilenceDetector:
             elif avg_pause > 3.0:
                 insights.append(f"{speaker_id}: Long average pauses ({avg_pause}s) - thinking/processing")
         
+        # Rank speakers by pause frequency (more pauses = less silence = more engagement)
+        ranking.sort(key=lambda row: row['pause_count'], reverse=True)
+        
         return {
             'total_silence_time': round(total_silence, 2),
-            'average_pause_count': round(avg_pause_count, 2),
-            'speaker_pause_ranking': [
-                {
-                    'speaker_id': s.get('speaker_id', 'Unknown'),
-                    'pause_count': s.get('pause_count', 0),
-                    'avg_pause_duration': s.get('average_pause_duration', 0),
-                    'total_silence': s.get('total_silence_duration', 0)
-                }
-                for s in pause_ranking
-            ],
-            'quietest_speaker': quietest.get('speaker_id', 'Unknown'),
-            'most_conversational': most_conversational.get('speaker_id', 'Unknown'),
+            'average_pause_count': round(np.mean(pause_counts), 2),
+            'speaker_pause_ranking': ranking,
+            'quietest_speaker': quietest_id,
+            'most_conversational': most_conversational_id,
             'insights': insights
         }
@@ -3,10 +3,85 @@ Speaker Detection Enhancement Module
 Advanced algorithms to properly identify and cluster 3+ speakers
 """
 
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Tuple
+import numba
 import numpy as np
-from scipy.spatial.distance import cdist
 import librosa
+import scipy.fft
+from threadpoolctl import threadpool_limits
+
+logger = logging.getLogger(__name__)
+
+
+@numba.njit("int64[:](float64[:, :], int64[:], float64)", cache=True)
+def _voice_cluster_kernel(features, label_nums, threshold):
+    """
+    Greedy voice clustering in one compiled pass over the segments.
+    A segment whose original label names an existing cluster (label_nums, 1-based)
+    joins it; otherwise it joins the first cluster whose founding segment is within
+    `threshold` (Euclidean distance / 10), or founds a new cluster.
+    Returns the 0-based cluster index of every segment
+    """
+    n, dim = features.shape
+    assignment = np.empty(n, np.int64)
+    founders = np.empty(n, np.int64)
+    n_clusters = 0
+    for i in range(n):
+        label = label_nums[i]
+        if 1 <= label <= n_clusters:
+            assignment[i] = label - 1
+            continue
+        assignment[i] = -1
+        for j in range(n_clusters):
+            acc = 0.0
+            for k in range(dim):
+                diff = features[i, k] - features[founders[j], k]
+                acc += diff * diff
+            if np.sqrt(acc) / 10.0 < threshold:
+                assignment[i] = j
+                break
+        if assignment[i] < 0:
+            founders[n_clusters] = i
+            assignment[i] = n_clusters
+            n_clusters += 1
+    return assignment
+
+
+@lru_cache(maxsize=8)
+def _mel_basis(sr: int, n_fft: int = 2048, n_mels: int = 128) -> np.ndarray:
+    """Mel filterbank, built once per (sr, n_fft, n_mels)"""
+    return librosa.filters.mel(sr=sr, n_fft=n_fft, n_mels=n_mels)
+
+
+@lru_cache(maxsize=8)
+def _mfcc_basis(n_mfcc: int = 13, n_mels: int = 128) -> np.ndarray:
+    """Orthonormal DCT-II rows that turn log-mel frames into MFCCs, as librosa.feature.mfcc does"""
+    return scipy.fft.dct(np.eye(n_mels), type=2, norm='ortho', axis=0)[:n_mfcc]
+
+
+def _to_soa(segments: List[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Struct-of-arrays view of segment dicts, built once so helpers scan plain arrays
+    instead of looking fields up segment by segment
+    """
+    return {
+        'starts': np.array([s.get('start', 0) for s in segments], dtype=np.float64),
+        'ends': np.array([s.get('end', 0) for s in segments], dtype=np.float64),
+        'speaker_ids': np.array([s.get('speaker_id', 'Unknown') for s in segments], dtype=object),
+        'confidences': np.array([s.get('confidence', 0.9) for s in segments], dtype=np.float64),
+    }
+
+
+def _speaker_label_number(label: str) -> int:
+    """N for a label of the form 'Speaker_N' (as this module names clusters), else -1"""
+    suffix = label[len('Speaker_'):]
+    if label.startswith('Speaker_') and suffix.isdigit() and f'Speaker_{int(suffix)}' == label:
+        return int(suffix)
+    return -1
 
 
 class SpeakerEnhancer:
@@ -58,7 +133,7 @@ class SpeakerEnhancer:
         
         # Step 4: Validate we have multiple speakers
         unique_speakers = len(set(s.get('speaker_id', 'Unknown') for s in enhanced_segments))
-        print(f"Enhanced speaker detection: {unique_speakers} unique speakers identified")
+        logger.info("Enhanced speaker detection: %d unique speakers identified", unique_speakers)
         
         return enhanced_segments
     
@@ -71,27 +146,27 @@ class SpeakerEnhancer:
             return segments
         
         # Sort by start time
-        sorted_segs = sorted(segments, key=lambda x: x.get('start', 0))
-        merged = []
-        current = dict(sorted_segs[0])
+        order = np.argsort([s.get('start', 0) for s in segments], kind='stable')
+        sorted_segs = [segments[i] for i in order]
+        soa = _to_soa(sorted_segs)
+        starts, ends, speaker_ids = soa['starts'], soa['ends'], soa['speaker_ids']
         
-        for next_seg in sorted_segs[1:]:
-            gap = next_seg.get('start', 0) - current.get('end', 0)
-            
-            # If same speaker and small gap, merge
-            if (next_seg.get('speaker_id') == current.get('speaker_id') and 
-                gap <= self.max_gap_to_merge):
-                # Extend current segment
-                current['end'] = next_seg.get('end', current['end'])
-                current['confidence'] = max(
-                    current.get('confidence', 0.9),
-                    next_seg.get('confidence', 0.9)
-                )
-            else:
-                merged.append(current)
-                current = dict(next_seg)
+        # A segment continues the previous one's turn if same speaker and small gap;
+        # each segment that does not starts a new merge group
+        continues = (speaker_ids[1:] == speaker_ids[:-1]) & (starts[1:] - ends[:-1] <= self.max_gap_to_merge)
+        group_first = np.flatnonzero(np.concatenate(([True], ~continues)))
+        group_last = np.append(group_first[1:], len(sorted_segs)) - 1
+        group_confidence = np.maximum.reduceat(soa['confidences'], group_first)
+        
+        merged = []
+        for first, last, confidence in zip(group_first.tolist(), group_last.tolist(), group_confidence.tolist()):
+            current = dict(sorted_segs[first])
+            if last > first:
+                # Extend to the end of the group's last segment
+                current['end'] = sorted_segs[last].get('end', current.get('end'))
+                current['confidence'] = confidence
+            merged.append(current)
         
-        merged.append(current)
         return merged
     
     def _refine_speaker_ids(
@@ -104,9 +179,10 @@ class SpeakerEnhancer:
         Refine speaker identification using voice characteristics
         Helps distinguish between speakers even if they weren't properly separated
         """
-        refined_segments = []
+        refined_segments = list(segments)
+        chunks = []
         
-        for seg in segments:
+        for index, seg in enumerate(segments):
             # Extract audio chunk for this segment
             start_sample = int(seg.get('start', 0) * sr)
             end_sample = int(seg.get('end', 0) * sr)
@@ -115,18 +191,20 @@ class SpeakerEnhancer:
             start_sample = max(0, start_sample)
             end_sample = min(len(y), end_sample)
             
-            if start_sample >= end_sample:
-                refined_segments.append(seg)
-                continue
-            
-            chunk = y[start_sample:end_sample]
-            
-            # Extract voice characteristics
-            voice_features = self._extract_voice_features(chunk, sr)
-            
-            refined_seg = dict(seg)
+            if start_sample < end_sample:
+                chunks.append((index, y[start_sample:end_sample]))
+        
+        # Extract voice characteristics concurrently; the STFT and BLAS work releases
+        # the GIL, and BLAS is held to one thread so the workers don't oversubscribe
+        with threadpool_limits(limits=1), ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            features = list(executor.map(
+                lambda item: self._extract_voice_features(item[1], sr), chunks
+            ))
+        
+        for (index, _), voice_features in zip(chunks, features):
+            refined_seg = dict(segments[index])
             refined_seg['voice_features'] = voice_features
-            refined_segments.append(refined_seg)
+            refined_segments[index] = refined_seg
         
         # Re-cluster speakers based on voice characteristics
         refined_segments = self._cluster_speakers_by_voice(refined_segments)
@@ -147,16 +225,16 @@ class SpeakerEnhancer:
             }
         
         try:
-            # Pitch estimation (fundamental frequency)
-            onset_env = librosa.onset.onset_strength(y=audio_chunk, sr=sr)
-            onset_frames = librosa.onset.onset_detect(onset_strength=onset_env, sr=sr)
+            # One STFT shared by the spectral features (same framing librosa uses for each)
+            magnitude = np.abs(librosa.stft(audio_chunk, n_fft=2048, hop_length=512))
             
             # MFCC (Mel-Frequency Cepstral Coefficients) - voice timbre
-            mfcc = librosa.feature.mfcc(y=audio_chunk, sr=sr, n_mfcc=13)
+            mel = _mel_basis(sr) @ (magnitude ** 2)
+            mfcc = _mfcc_basis() @ librosa.power_to_db(mel)
             mfcc_mean = np.mean(mfcc, axis=1).tolist() if mfcc.size > 0 else [0] * 13
             
             # Spectral centroid - brightness of voice
-            spectral_centroid = librosa.feature.spectral_centroid(y=audio_chunk, sr=sr)
+            spectral_centroid = librosa.feature.spectral_centroid(S=magnitude, sr=sr)
             centroid_mean = float(np.mean(spectral_centroid)) if spectral_centroid.size > 0 else 0
             
             # Zero crossing rate - noisiness
@@ -167,11 +245,11 @@ class SpeakerEnhancer:
                 'mfcc_mean': mfcc_mean,
                 'spectral_centroid': centroid_mean,
                 'zero_crossing_rate': zcr_mean,
-                'energy': float(np.mean(audio_chunk ** 2))
+                'energy': float(np.einsum('i,i->', audio_chunk, audio_chunk) / audio_chunk.size)
             }
         
-        except Exception as e:
-            print(f"Feature extraction error: {str(e)}")
+        except Exception:
+            logger.exception("Feature extraction error")
             return {
                 'mfcc_mean': [0] * 13,
                 'spectral_centroid': 0,
@@ -201,100 +279,43 @@ class SpeakerEnhancer:
         
         # Simple clustering: group similar voice characteristics
         # Assign speaker ID based on cluster membership
-        speaker_mapping = {}
-        next_speaker_id = 1
-        
-        for i, seg in enumerate(segments):
-            current_speaker = seg.get('speaker_id', f'Speaker_{i+1}')
-            
-            # If speaker not yet mapped, assign new ID
-            if current_speaker not in speaker_mapping:
-                # Check if similar to existing speakers
-                found_match = False
-                
-                for existing_speaker, indices in speaker_mapping.items():
-                    if indices:  # If speaker has segments
-                        # Calculate similarity to existing speaker
-                        existing_idx = indices[0]
-                        distance = self._calculate_voice_distance(
-                            features_list[i],
-                            features_list[existing_idx]
-                        )
-                        
-                        # If similar enough, group with existing speaker
-                        if distance < 0.7:
-                            speaker_mapping[existing_speaker].append(i)
-                            found_match = True
-                            break
-                
-                # If no match found, assign new speaker
-                if not found_match:
-                    new_speaker = f'Speaker_{next_speaker_id}'
-                    speaker_mapping[new_speaker] = [i]
-                    next_speaker_id += 1
-            else:
-                if current_speaker not in speaker_mapping:
-                    speaker_mapping[current_speaker] = []
-                speaker_mapping[current_speaker].append(i)
+        label_nums = np.array([
+            _speaker_label_number(seg.get('speaker_id', f'Speaker_{i+1}'))
+            for i, seg in enumerate(segments)
+        ], dtype=np.int64)
+        assignment = _voice_cluster_kernel(
+            np.asarray(features_list, dtype=np.float64), label_nums, 0.7
+        )
         
         # Apply speaker mapping
-        speaker_reassignment = {}
-        for speaker_id, indices in speaker_mapping.items():
-            for idx in indices:
-                speaker_reassignment[idx] = speaker_id
-        
-        for i, seg in enumerate(segments):
-            seg['speaker_id'] = speaker_reassignment.get(i, f'Speaker_{i+1}')
+        for seg, cluster in zip(segments, assignment.tolist()):
+            seg['speaker_id'] = f'Speaker_{cluster + 1}'
         
         return segments
     
-    def _calculate_voice_distance(self, vec1: List[float], vec2: List[float]) -> float:
-        """
-        Calculate distance between two voice feature vectors
-        Lower distance = more similar voices
-        """
-        if len(vec1) == 0 or len(vec2) == 0:
-            return 1.0
-        
-        try:
-            vec1_arr = np.array(vec1).reshape(1, -1)
-            vec2_arr = np.array(vec2).reshape(1, -1)
-            
-            # Use Euclidean distance
-            distance = float(cdist(vec1_arr, vec2_arr, metric='euclidean')[0][0])
-            
-            # Normalize to 0-1 range
-            return min(distance / 10.0, 1.0)
-        except:
-            return 1.0
-    
     def get_speaker_summary(self, segments: List[Dict]) -> Dict:
         """
         Get summary of detected speakers
         """
-        speaker_data = {}
+        if not segments:
+            return {}
         
-        for seg in segments:
-            speaker_id = seg.get('speaker_id', 'Unknown')
-            duration = seg.get('end', 0) - seg.get('start', 0)
-            
-            if speaker_id not in speaker_data:
-                speaker_data[speaker_id] = {
-                    'total_duration': 0,
-                    'turn_count': 0,
-                    'confidence_scores': []
-                }
-            
-            speaker_data[speaker_id]['total_duration'] += duration
-            speaker_data[speaker_id]['turn_count'] += 1
-            speaker_data[speaker_id]['confidence_scores'].append(seg.get('confidence', 0.9))
+        soa = _to_soa(segments)
+        speaker_ids, first_seen, inverse = np.unique(
+            soa['speaker_ids'], return_index=True, return_inverse=True
+        )
         
-        # Calculate average confidence per speaker
-        for speaker_id in speaker_data:
-            scores = speaker_data[speaker_id]['confidence_scores']
-            speaker_data[speaker_id]['avg_confidence'] = (
-                np.mean(scores) if scores else 0.9
-            )
-            del speaker_data[speaker_id]['confidence_scores']
+        # Per-speaker totals in one pass each
+        total_duration = np.bincount(inverse, weights=soa['ends'] - soa['starts'])
+        turn_count = np.bincount(inverse)
+        avg_confidence = np.bincount(inverse, weights=soa['confidences']) / turn_count
         
-        return speaker_data
+        # Speakers in order of first appearance
+        return {
+            speaker_ids[k]: {
+                'total_duration': float(total_duration[k]),
+                'turn_count': int(turn_count[k]),
+                'avg_confidence': float(avg_confidence[k])
+            }
+            for k in np.argsort(first_seen).tolist()
+        }
@@ -3,39 +3,75 @@ Speech-to-Text with Speaker Identification Module
 Transcribes audio and associates speech with identified speakers
 """
 
-import whisper
+import logging
+import os
+import re
+import ctranslate2
 import numpy as np
-from typing import List, Dict
-import librosa
+from collections import Counter
+from functools import lru_cache
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from typing import List, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+# Speech chunks (up to 30 s each) decoded together per encoder/decoder call
+WHISPER_BATCH_SIZE = 16
+
+# Keyword candidates (two or more letters/apostrophes) and sentence breaks
+_WORD_RE = re.compile(r"[a-z']{2,}")
+_SENT_RE = re.compile(r'[.!?]+')
+_COMMON_WORDS = frozenset({'the', 'and', 'that', 'this', 'with', 'from', 'have', 'what', 'when', 'where', 'which'})
+
+
+@lru_cache(maxsize=4)
+def _load_whisper(model_size: str, compute_type: str) -> WhisperModel:
+    """Load a Whisper model once per process; services asking for the same size share it"""
+    # CTranslate2 uses 4 CPU threads unless told otherwise; ignored on GPU
+    model = WhisperModel(
+        model_size, device="auto", compute_type=compute_type, cpu_threads=os.cpu_count() or 0
+    )
+    # Decode one silent 30 s window so device setup and kernel selection happen at
+    # load time rather than in the first task (VAD would skip silence, so it is off)
+    segments, _ = model.transcribe(
+        np.zeros(30 * 16000, dtype=np.float32), beam_size=1, vad_filter=False, language="en"
+    )
+    for _ in segments:
+        pass
+    return model
 
 
 class SpeechToTextService:
-    """Converts speech to text with speaker attribution using Whisper"""
+    """Converts speech to text with speaker attribution using Whisper (CTranslate2 backend)"""
     
     def __init__(self, model_size: str = "base"):
         """
-        Initialize Whisper model
+        Initialize Whisper model with int8 weights
         
         Args:
             model_size: Size of Whisper model ('tiny', 'base', 'small', 'medium', 'large')
         """
         try:
-            self.model = whisper.load_model(model_size)
-        except Exception as e:
-            print(f"Error loading Whisper model: {str(e)}")
+            on_gpu = ctranslate2.get_cuda_device_count() > 0
+            self.model = _load_whisper(model_size, "int8_float16" if on_gpu else "int8")
+            # Splits the audio on voice activity and decodes the chunks in batches
+            self.pipeline = BatchedInferencePipeline(model=self.model)
+        except Exception:
+            logger.exception("Error loading Whisper model")
             self.model = None
+            self.pipeline = None
     
-    def transcribe_audio(self, audio_path: str) -> Dict:
+    def transcribe_audio(self, audio: Union[str, np.ndarray]) -> Dict:
         """
-        Transcribe audio file using Whisper
+        Transcribe audio using Whisper
         
         Args:
-            audio_path: Path to audio file
+            audio: Path to audio file, or a mono 16 kHz waveform already in memory
             
         Returns:
             Dictionary with transcription and word-level timestamps
         """
-        if not self.model:
+        if not self.pipeline:
             return {
                 'full_transcript': '',
                 'segments': [],
@@ -43,20 +79,28 @@ class SpeechToTextService:
             }
         
         try:
-            # Transcribe with word-level timestamps
-            result = self.model.transcribe(
-                audio_path,
-                verbose=False,
+            if isinstance(audio, np.ndarray):
+                audio = audio.astype(np.float32, copy=False)
+            segments, info = self.pipeline.transcribe(
+                audio,
+                batch_size=WHISPER_BATCH_SIZE,
+                beam_size=1,
                 language=None  # Auto-detect language
             )
             
+            # Segments are produced lazily; decoding happens while collecting them
+            segments = [
+                {'id': seg.id, 'start': seg.start, 'end': seg.end, 'text': seg.text}
+                for seg in segments
+            ]
+            
             return {
-                'full_transcript': result.get('text', ''),
-                'segments': result.get('segments', []),
-                'language': result.get('language', 'en')
+                'full_transcript': ''.join(seg['text'] for seg in segments),
+                'segments': segments,
+                'language': info.language or 'en'
             }
-        except Exception as e:
-            print(f"Transcription error: {str(e)}")
+        except Exception:
+            logger.exception("Transcription error")
             return {
                 'full_transcript': '',
                 'segments': [],
@@ -79,69 +123,103 @@ class SpeechToTextService:
         Returns:
             List of speaker segments with matched transcription
         """
-        matched_segments = []
-        transcript_segments_copy = transcript_segments.copy()
+        return self.match_transcript_to_speakers_soa(
+            transcript_segments,
+            np.fromiter((s.get('start', 0) for s in speaker_segments), dtype=np.float64, count=len(speaker_segments)),
+            np.fromiter((s.get('end', 0) for s in speaker_segments), dtype=np.float64, count=len(speaker_segments)),
+            [s.get('speaker_id', 'Unknown') for s in speaker_segments]
+        )
+    
+    def match_transcript_to_speakers_soa(
+        self,
+        transcript_segments: List[Dict],
+        starts: np.ndarray,
+        ends: np.ndarray,
+        speaker_ids: List[str]
+    ) -> List[Dict]:
+        """
+        Transcript matching over speaker segments given as parallel arrays
+        Overlaps for every (speaker, transcript) pair are computed in one broadcast
         
-        for speaker_seg in speaker_segments:
-            speaker_start = speaker_seg.get('start', 0)
-            speaker_end = speaker_seg.get('end', 0)
-            speaker_id = speaker_seg.get('speaker_id', 'Unknown')
-            speaker_duration = speaker_end - speaker_start
-            
-            # Find transcription segments with best temporal overlap
-            matching_texts = []
-            matched_trans_indices = []
-            
-            for trans_idx, trans_seg in enumerate(transcript_segments):
-                trans_start = trans_seg.get('start', 0)
-                trans_end = trans_seg.get('end', 0)
-                trans_text = trans_seg.get('text', '').strip()
-                
-                # Calculate overlap percentage
-                overlap_start = max(speaker_start, trans_start)
-                overlap_end = min(speaker_end, trans_end)
-                
-                if overlap_end > overlap_start:  # There is overlap
-                    overlap_duration = overlap_end - overlap_start
-                    overlap_percentage = (overlap_duration / speaker_duration * 100) if speaker_duration > 0 else 0
-                    
-                    # Accept if at least 50% overlap
-                    if overlap_percentage > 50 and trans_text:
-                        matching_texts.append(trans_text)
-                        matched_trans_indices.append(trans_idx)
+        Args:
+            transcript_segments: List of transcript segments with timestamps
+            starts: Speaker segment start times
+            ends: Speaker segment end times
+            speaker_ids: Speaker label of each segment
             
-            # Combine matching text - prioritize contiguous segments
-            if matching_texts:
-                full_text = ' '.join(matching_texts)
+        Returns:
+            List of speaker segments with matched transcription
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        durations = ends - starts
+        
+        trans_starts = np.fromiter((t.get('start', 0) for t in transcript_segments), dtype=np.float64, count=len(transcript_segments))
+        trans_ends = np.fromiter((t.get('end', 0) for t in transcript_segments), dtype=np.float64, count=len(transcript_segments))
+        trans_texts = [t.get('text', '').strip() for t in transcript_segments]
+        has_text = np.fromiter((bool(text) for text in trans_texts), dtype=bool, count=len(trans_texts))
+        
+        # Overlap of every speaker segment (rows) with every transcript segment (columns)
+        overlap = np.minimum(ends[:, None], trans_ends) - np.maximum(starts[:, None], trans_starts)
+        
+        # Accept if the transcript covers more than 50% of the speaker segment
+        with np.errstate(divide='ignore', invalid='ignore'):
+            overlap_percentage = np.where(durations[:, None] > 0, overlap / durations[:, None] * 100, 0)
+        matches = (overlap > 0) & (overlap_percentage > 50) & has_text
+        
+        # Fallback: closest transcript segment by start time
+        closest = self._closest_by_start(starts, trans_starts) if trans_texts else None
+        
+        matched_segments = []
+        for i, speaker_id in enumerate(speaker_ids):
+            matched = np.flatnonzero(matches[i])
+            if matched.size:
+                full_text = ' '.join(trans_texts[j] for j in matched)
+            elif closest is not None:
+                full_text = trans_texts[closest[i]]
             else:
-                # Fallback: find closest transcript segment
-                closest_dist = float('inf')
-                closest_text = ''
-                
-                for trans_seg in transcript_segments:
-                    trans_start = trans_seg.get('start', 0)
-                    trans_end = trans_seg.get('end', 0)
-                    
-                    # Distance to segment
-                    distance = abs(speaker_start - trans_start)
-                    
-                    if distance < closest_dist:
-                        closest_dist = distance
-                        closest_text = trans_seg.get('text', '').strip()
-                
-                full_text = closest_text
+                full_text = ''
             
+            speaker_start = float(starts[i])
+            speaker_end = float(ends[i])
             matched_segments.append({
                 'speaker_id': speaker_id,
                 'start': speaker_start,
                 'end': speaker_end,
-                'duration': speaker_duration,
+                'duration': speaker_end - speaker_start,
                 'transcript': full_text,
                 'word_count': len(full_text.split()) if full_text else 0
             })
         
         return matched_segments
     
+    @staticmethod
+    def _closest_by_start(starts: np.ndarray, trans_starts: np.ndarray) -> np.ndarray:
+        """
+        Index of the transcript segment whose start is nearest each speaker start
+        Binary search over the sorted starts; ties go to the earliest segment, as argmin would
+        """
+        order = np.argsort(trans_starts, kind='stable')
+        sorted_starts = trans_starts[order]
+        last = len(sorted_starts) - 1
+        
+        # Nearest candidates on either side: first start >= speaker start, and the one before it
+        right = np.searchsorted(sorted_starts, starts)
+        left = right - 1
+        right_idx = np.minimum(right, last)
+        left_idx = np.maximum(left, 0)
+        # Equal starts sort together; take the earliest segment of the left candidate's run
+        left_idx = np.searchsorted(sorted_starts, sorted_starts[left_idx])
+        
+        right_dist = np.where(right <= last, sorted_starts[right_idx] - starts, np.inf)
+        left_dist = np.where(left >= 0, starts - sorted_starts[left_idx], np.inf)
+        right_seg = order[right_idx]
+        left_seg = order[left_idx]
+        return np.where(
+            left_dist < right_dist, left_seg,
+            np.where(right_dist < left_dist, right_seg, np.minimum(left_seg, right_seg))
+        )
+    
     def get_speaker_transcripts(
         self,
         speaker_transcript_segments: List[Dict]
@@ -159,30 +237,29 @@ class SpeechToTextService:
         
         for segment in speaker_transcript_segments:
             speaker_id = segment.get('speaker_id', 'Unknown')
-            transcript = segment.get('transcript', '')
-            word_count = segment.get('word_count', 0)
             
-            if speaker_id not in speaker_data:
-                speaker_data[speaker_id] = {
+            # One lookup per segment; speakers without any text still get an entry
+            entry = speaker_data.get(speaker_id)
+            if entry is None:
+                entry = speaker_data[speaker_id] = {
                     'full_transcript': [],
                     'total_words': 0,
                     'segments': []
                 }
             
+            transcript = segment.get('transcript', '')
             if transcript:
-                speaker_data[speaker_id]['full_transcript'].append(transcript)
-                speaker_data[speaker_id]['total_words'] += word_count
-                speaker_data[speaker_id]['segments'].append({
+                entry['full_transcript'].append(transcript)
+                entry['total_words'] += segment.get('word_count', 0)
+                entry['segments'].append({
                     'start': segment.get('start', 0),
                     'end': segment.get('end', 0),
                     'text': transcript
                 })
         
         # Combine full transcripts
-        for speaker_id in speaker_data:
-            speaker_data[speaker_id]['full_transcript'] = ' '.join(
-                speaker_data[speaker_id]['full_transcript']
-            )
+        for entry in speaker_data.values():
+            entry['full_transcript'] = ' '.join(entry['full_transcript'])
         
         return speaker_data
     
@@ -205,9 +282,10 @@ class SpeechToTextService:
                 'average_sentence_length': 0
             }
         
-        # Simple statistics
-        words = transcript.split()
-        sentences = transcript.split('.')
+        # Simple statistics; every whitespace-separated token counts as a word
+        lower = transcript.lower()
+        words = lower.split()
+        sentences = _SENT_RE.split(transcript)
         
         # Count questions and statements
         questions = transcript.count('?')
@@ -215,16 +293,16 @@ class SpeechToTextService:
         
         avg_sentence_length = len(words) / len(sentences) if sentences else 0
         
-        # Extract potential keywords (simplified - words longer than 5 chars and not common words)
-        common_words = {'the', 'and', 'that', 'this', 'with', 'from', 'have', 'what', 'when', 'where', 'which'}
-        keywords = list(set(
-            w.lower() for w in words 
-            if len(w) > 5 and w.lower() not in common_words
-        ))[:10]
+        # Extract potential keywords (simplified - the most frequent words longer than
+        # 5 chars that are not common words)
+        keywords = [
+            w for w, _ in Counter(_WORD_RE.findall(lower)).most_common()
+            if len(w) > 5 and w not in _COMMON_WORDS
+        ][:10]
         
         return {
             'total_words': len(words),
-            'unique_words': len(set(w.lower() for w in words)),
+            'unique_words': len(set(words)),
             'keywords': keywords,
             'questions_asked': questions,
             'statements_made': statements,
@@ -0,0 +1,11 @@
+"""
+Redis cache helpers shared by the API and the Celery worker
+"""
+
+# Analyses are immutable once written, so cached bodies can live for a day
+ANALYSIS_CACHE_TTL = 86400
+
+
+def analysis_cache_key(meeting_id: str) -> str:
+    """Redis key holding the serialized /analysis/{meeting_id} response body"""
+    return f"analysis:{meeting_id}"
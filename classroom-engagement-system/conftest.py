@@ -0,0 +1,12 @@
+"""
+Shared pytest fixtures for the Classroom Engagement System tests
+"""
+
+import pytest
+from app.tasks.diarization import DiarizationService
+
+
+@pytest.fixture(scope="session")
+def diarization_service():
+    """One DiarizationService for the whole run, so model loading and kernel compilation happen once"""
+    return DiarizationService()
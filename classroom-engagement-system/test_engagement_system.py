@@ -8,42 +8,68 @@ Tests cover:
 
 import pytest
 import json
+import numpy as np
 from datetime import datetime
 from app.models.meeting import SpeakerSegment, MeetingAnalysis, SourceType
-from app.tasks.diarization import DiarizationService
+from app.tasks.diarization import _engagement_score
 
 
 class TestEngagementMetrics:
     """Test engagement metric calculations"""
     
-    def test_speaker_talk_time_calculation(self):
+    @pytest.mark.parametrize("segments,duration,expected", [
+        (
+            [
+                SpeakerSegment(start=0.0, end=5.0, speaker_id="Speaker_1"),
+                SpeakerSegment(start=5.0, end=10.0, speaker_id="Speaker_2"),
+                SpeakerSegment(start=10.0, end=15.0, speaker_id="Speaker_1"),
+            ],
+            15.0,
+            {"Speaker_1": 10.0, "Speaker_2": 5.0},
+        ),
+        (
+            [
+                SpeakerSegment(start=0.0, end=2.5, speaker_id="Speaker_1"),
+                SpeakerSegment(start=2.5, end=4.0, speaker_id="Speaker_3"),
+                SpeakerSegment(start=4.0, end=9.0, speaker_id="Speaker_2"),
+                SpeakerSegment(start=9.0, end=10.0, speaker_id="Speaker_3"),
+            ],
+            10.0,
+            {"Speaker_1": 2.5, "Speaker_3": 2.5, "Speaker_2": 5.0},
+        ),
+    ])
+    def test_speaker_talk_time_calculation(self, diarization_service, segments, duration, expected):
         """Test calculation of talk time per speaker"""
-        segments = [
-            SpeakerSegment(start=0.0, end=5.0, speaker_id="Speaker_1"),
-            SpeakerSegment(start=5.0, end=10.0, speaker_id="Speaker_2"),
-            SpeakerSegment(start=10.0, end=15.0, speaker_id="Speaker_1"),
-        ]
-        
-        service = DiarizationService()
-        metrics = service.calculate_engagement_metrics(segments, 15.0)
+        metrics = diarization_service.calculate_engagement_metrics(segments, duration)
         
-        assert metrics["speaker_talk_time"]["Speaker_1"] == 10.0
-        assert metrics["speaker_talk_time"]["Speaker_2"] == 5.0
+        assert metrics["speaker_talk_time"] == expected
     
-    def test_participation_percentage(self):
+    @pytest.mark.parametrize("segments,duration,expected", [
+        (
+            [
+                SpeakerSegment(start=0.0, end=6.0, speaker_id="Speaker_1"),
+                SpeakerSegment(start=6.0, end=10.0, speaker_id="Speaker_2"),
+            ],
+            10.0,
+            {"Speaker_1": 60.0, "Speaker_2": 40.0},
+        ),
+        (
+            [
+                SpeakerSegment(start=0.0, end=1.0, speaker_id="Speaker_1"),
+                SpeakerSegment(start=1.0, end=2.0, speaker_id="Speaker_2"),
+                SpeakerSegment(start=2.0, end=3.0, speaker_id="Speaker_3"),
+            ],
+            3.0,
+            {"Speaker_1": 33.33, "Speaker_2": 33.33, "Speaker_3": 33.33},
+        ),
+    ])
+    def test_participation_percentage(self, diarization_service, segments, duration, expected):
         """Test participation percentage calculation"""
-        segments = [
-            SpeakerSegment(start=0.0, end=6.0, speaker_id="Speaker_1"),
-            SpeakerSegment(start=6.0, end=10.0, speaker_id="Speaker_2"),
-        ]
+        metrics = diarization_service.calculate_engagement_metrics(segments, duration)
         
-        service = DiarizationService()
-        metrics = service.calculate_engagement_metrics(segments, 10.0)
-        
-        assert metrics["speaker_participation"]["Speaker_1"] == 60.0
-        assert metrics["speaker_participation"]["Speaker_2"] == 40.0
+        assert metrics["speaker_participation"] == expected
     
-    def test_turn_taking_frequency(self):
+    def test_turn_taking_frequency(self, diarization_service):
         """Test turn-taking frequency calculation"""
         segments = [
             SpeakerSegment(start=0.0, end=2.0, speaker_id="Speaker_1"),
@@ -52,14 +78,13 @@ class TestEngagementMetrics:
             SpeakerSegment(start=6.0, end=8.0, speaker_id="Speaker_2"),  # Turn 3
         ]
         
-        service = DiarizationService()
-        metrics = service.calculate_engagement_metrics(segments, 8.0)  # 8 seconds = 0.133 minutes
+        metrics = diarization_service.calculate_engagement_metrics(segments, 8.0)  # 8 seconds = 0.133 minutes
         
         # 3 turns in 8 seconds = 3 / (8/60) = 22.5 turns per minute
         expected_frequency = 3 / (8 / 60)
         assert abs(metrics["turn_taking_frequency"] - expected_frequency) < 0.01
     
-    def test_engagement_score_high_participation_balance(self):
+    def test_engagement_score_high_participation_balance(self, diarization_service):
         """Test engagement score with balanced participation"""
         segments = [
             SpeakerSegment(start=0.0, end=5.0, speaker_id="Speaker_1"),
@@ -68,25 +93,59 @@ class TestEngagementMetrics:
             SpeakerSegment(start=10.0, end=10.5, speaker_id="Speaker_2"),
         ]
         
-        service = DiarizationService()
-        metrics = service.calculate_engagement_metrics(segments, 10.5)
+        metrics = diarization_service.calculate_engagement_metrics(segments, 10.5)
         
         # Should have reasonable balance and turn-taking
         assert metrics["engagement_score"] > 50.0
         assert metrics["engagement_score"] <= 100.0
     
-    def test_engagement_score_low_with_unbalanced_participation(self):
+    def test_engagement_score_low_with_unbalanced_participation(self, diarization_service):
         """Test engagement score with imbalanced participation"""
         segments = [
             SpeakerSegment(start=0.0, end=100.0, speaker_id="Speaker_1"),
             SpeakerSegment(start=100.0, end=105.0, speaker_id="Speaker_2"),
         ]
         
-        service = DiarizationService()
-        metrics = service.calculate_engagement_metrics(segments, 105.0)
+        metrics = diarization_service.calculate_engagement_metrics(segments, 105.0)
         
         # Very imbalanced (95% vs 5%)
         assert metrics["engagement_score"] < 50.0
+    
+    def test_metrics_from_segment_generator(self, diarization_service):
+        """Test that segments streamed from a generator give the same metrics"""
+        segments = [
+            SpeakerSegment(start=0.0, end=5.0, speaker_id="Speaker_1"),
+            SpeakerSegment(start=5.0, end=10.0, speaker_id="Speaker_2"),
+            SpeakerSegment(start=10.0, end=15.0, speaker_id="Speaker_1"),
+        ]
+        
+        expected = diarization_service.calculate_engagement_metrics(segments, 15.0)
+        streamed = diarization_service.calculate_engagement_metrics((s for s in segments), 15.0)
+        
+        assert streamed.as_dict() == expected.as_dict()
+    
+    def test_engagement_score_cached(self):
+        """Test that identical segment statistics reuse the cached score"""
+        first = _engagement_score((10.0, 5.0), 15.0, 2)
+        second = _engagement_score((10.0, 5.0), 15.0, 2)
+        
+        assert id(first) == id(second)
+    
+    def test_turn_taking_frequency_random_sequence(self, diarization_service):
+        """Test turn counting on a long random speaker sequence"""
+        rng = np.random.default_rng(0)
+        speaker_codes = rng.integers(0, 4, size=10000)
+        segments = SpeakerSegment.batch_from_arrays(
+            np.arange(10000.0),
+            np.arange(1.0, 10001.0),
+            [f"Speaker_{code + 1}" for code in speaker_codes]
+        )
+        
+        metrics = diarization_service.calculate_engagement_metrics(segments, 60.0)  # 1 minute
+        
+        # Over one minute the frequency equals the number of speaker switches
+        expected_turns = np.count_nonzero(np.diff(speaker_codes))
+        assert metrics["turn_taking_frequency"] == expected_turns
 
 
 class TestDataModels:
@@ -145,15 +204,66 @@ class TestDataModels:
         data = analysis.model_dump()
         assert data["meeting_id"] == "test-001"
         assert data["source_type"] == "live"
+        
+        # And straight to JSON
+        data = json.loads(analysis.model_dump_json())
+        assert data["meeting_id"] == "test-001"
+        assert data["segments"] == []
+
+
+class _RaisingCursor:
+    """Stand-in Motor cursor that yields some documents, then raises"""
+    
+    def __init__(self, documents):
+        self.documents = list(documents)
+    
+    def sort(self, *args, **kwargs):
+        return self
+    
+    def limit(self, *args, **kwargs):
+        return self
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if not self.documents:
+            raise ConnectionError("MongoDB connection lost")
+        return self.documents.pop(0)
+
+
+class TestAllAnalysesStreaming:
+    """Test that /all-analyses never reports a failed read as success"""
+    
+    def _client(self, documents):
+        from types import SimpleNamespace
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from app.routes.meetings import router
+        
+        app = FastAPI()
+        app.include_router(router, prefix="/api")
+        app.state.meetings_collection = SimpleNamespace(find=lambda *a, **k: _RaisingCursor(documents))
+        return TestClient(app)
+    
+    def test_error_before_first_document_returns_500(self):
+        response = self._client([]).get("/api/all-analyses")
+        
+        assert response.status_code == 500
+    
+    def test_error_mid_stream_aborts_response(self):
+        client = self._client([{"_id": "a1", "meeting_id": "test-001"}])
+        
+        with pytest.raises(ConnectionError):
+            client.get("/api/all-analyses")
 
 
 class TestMockSegments:
     """Test mock segment generation"""
     
-    def test_mock_segments_generation(self):
+    def test_mock_segments_generation(self, diarization_service):
         """Test that mock segments are generated correctly"""
-        service = DiarizationService()
-        segments = service._create_mock_segments()
+        segments = diarization_service._create_mock_segments()
         
         assert len(segments) == 4
         assert segments[0].speaker_id == "Speaker_1"
@@ -174,31 +284,40 @@ class TestAPIWorkflow:
         3. Retrieve analysis
         4. Validate metrics
         """
-        import requests
-        
-        # Upload
-        files = {"file": open("test_audio.wav", "rb")}
-        response = requests.post(
-            "http://localhost:8000/api/analyze-meeting",
-            files=files,
-            data={"meeting_id": "test-001", "source_type": "teams"}
-        )
-        
-        assert response.status_code == 200
-        task_id = response.json()["task_id"]
-        
-        # Poll status
-        # (In real test, use polling loop)
+        import mmap
         import time
-        time.sleep(10)
+        import httpx
         
-        status_response = requests.get(f"http://localhost:8000/api/task-status/{task_id}")
-        assert status_response.json()["status"] in ["SUCCESS", "PENDING"]
-        
-        # Get analysis
-        analysis_response = requests.get("http://localhost:8000/api/analysis/test-001")
-        assert analysis_response.status_code == 200
-        data = analysis_response.json()["data"]
+        # One pooled keep-alive connection for the upload, every poll and the fetch
+        with httpx.Client(base_url="http://localhost:8000/api", timeout=30.0) as client:
+            # Upload straight from the page cache through a read-only mapping
+            with open("test_audio.wav", "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as audio:
+                response = client.post(
+                    "/analyze-meeting",
+                    files={"file": ("test_audio.wav", audio, "audio/wav")},
+                    data={"meeting_id": "test-001", "source_type": "teams"}
+                )
+            
+            assert response.status_code == 200
+            task_id = response.json()["task_id"]
+            
+            # Poll status until the task finishes, backing off from 0.1 s to 2 s
+            deadline = time.monotonic() + 300
+            delay = 0.1
+            status = "PENDING"
+            while time.monotonic() < deadline:
+                status = client.get(f"/task-status/{task_id}").json()["status"]
+                if status in ("SUCCESS", "FAILURE"):
+                    break
+                time.sleep(delay)
+                delay = min(delay * 1.5, 2.0)
+            assert status == "SUCCESS"
+            
+            # Get analysis
+            analysis_response = client.get("/analysis/test-001")
+            assert analysis_response.status_code == 200
+            data = analysis_response.json()["data"]
         
         # Verify metrics exist
         assert "engagement_score" in data
@@ -207,30 +326,53 @@ class TestAPIWorkflow:
 
 
 # Performance test example
-@pytest.mark.skip(reason="Performance test - run separately")
-def test_large_audio_processing():
+SPEAKERS = tuple(f"Speaker_{k}" for k in range(1, 6))
+
+
+@pytest.fixture(scope="module")
+def large_segments():
+    """Large segment list, built once from arrays so its construction is not timed"""
+    starts = np.arange(1000, dtype=np.float64)
+    ends = starts + 1.0
+    speaker_ids = [SPEAKERS[i % 5] for i in range(1000)]
+    return SpeakerSegment.batch_from_arrays(starts, ends, speaker_ids)
+
+
+def test_compiled_kernel_matches_numba(large_segments):
+    """Test that the optional C kernel matches the Numba kernel"""
+    engagement_c = pytest.importorskip("app.tasks._engagement_c")
+    from app.tasks._diarization_kernels import engagement_kernel
+    
+    starts = np.array([s.start for s in large_segments])
+    ends = np.array([s.end for s in large_segments])
+    _, speaker_idx = np.unique([s.speaker_id for s in large_segments], return_inverse=True)
+    speaker_idx = speaker_idx.astype(np.int64)
+    
+    expected = engagement_kernel(starts, ends, speaker_idx, 5)
+    result = engagement_c.engagement_kernel(starts, ends, speaker_idx, 5)
+    
+    for got, want in zip(result[:3], expected[:3]):
+        assert np.array_equal(got, want)
+    assert result[3] == expected[3]
+
+
+# Warm 1000-segment metrics take about a millisecond, while compiling the kernels
+# takes seconds; a budget between the two fails if compilation or a pure-Python
+# fallback ever lands on the warm path
+WARM_BUDGET_S = 0.05
+
+
+@pytest.mark.benchmark(warmup=True, min_rounds=5)
+def test_large_audio_processing(request, diarization_service, large_segments):
     """Test processing of large audio file"""
-    import time
-    
-    service = DiarizationService()
-    
-    # Create large segment list
-    segments = []
-    for i in range(1000):
-        segments.append(
-            SpeakerSegment(
-                start=float(i),
-                end=float(i + 1),
-                speaker_id=f"Speaker_{(i % 5) + 1}"
-            )
-        )
+    pytest.importorskip("pytest_benchmark")
+    benchmark = request.getfixturevalue("benchmark")
     
-    start_time = time.time()
-    metrics = service.calculate_engagement_metrics(segments, 1000.0)
-    elapsed_time = time.time() - start_time
+    # Warm-up rounds run first, so Numba compilation is never part of the timing
+    metrics = benchmark(diarization_service.calculate_engagement_metrics, large_segments, 1000.0)
     
-    print(f"Processing 1000 segments took {elapsed_time:.3f} seconds")
-    assert elapsed_time < 1.0  # Should be fast
+    assert metrics["engagement_score"] > 0
+    assert benchmark.stats.stats.mean < WARM_BUDGET_S
 
 
 if __name__ == "__main__":